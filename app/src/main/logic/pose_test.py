@@ -1,17 +1,13 @@
-import time
-import cv2
-import mediapipe as mp
-import numpy as np
-from utils import get_landmark_features, angle_at_point
-
-# quick compatibility check for MediaPipe: some installs expose the newer
-# "tasks" API instead of the classic `mp.solutions` module used here.
 import argparse
+import queue
+import threading
 import time
 import cv2
 import numpy as np
 from utils import angle_at_point
 
+# quick compatibility check for MediaPipe: some installs expose the newer
+# "tasks" API instead of the classic `mp.solutions` module used here.
 # Try Tasks API first (requires .task model), fallback to legacy solutions API (bundled)
 USING_TASKS_API = False
 try:
@@ -53,41 +49,250 @@ DICT_FEATURES = {
 }
 
 
-def is_full_body_visible(landmarks, tol=0.03):
+# indices to check: shoulders, elbows, wrists, hips, knees, feet, nose
+_CHECK_IDX = np.array(
+    sorted({*DICT_FEATURES['left'].values(), *DICT_FEATURES['right'].values(), DICT_FEATURES['nose']}),
+    dtype=np.int32,
+)
+VIS_THRESH = 0.15
+# once ready, the full-body check only re-runs every N frames (~1s at 30 FPS)
+READY_RECHECK_FRAMES = 30
+
+# (width, height) fed to pose inference; landmarks come back normalized, so
+# overlay coordinates are still scaled by the full display frame size
+INFER_SIZE = (256, 192)
+
+# pose inference is skipped on static scenes once nobody has been framed for this many frames
+IDLE_FRAMES_BEFORE_GATING = 60
+MOTION_THRESH = 2.0
+# while gated, inference still runs at least once every N frames (~1s at 30 FPS)
+MAX_GATED_FRAMES = 30
+
+# LatestFrameReader.read() gives up (returns no frame) after waiting this many
+# seconds; it also returns early once the capture thread has exited
+READ_TIMEOUT_S = 5.0
+READ_POLL_S = 0.1
+
+# flat (shoulder, elbow, wrist, hip, knee, foot) indices per side
+SIDE_KEYS = ('shoulder', 'elbow', 'wrist', 'hip', 'knee', 'foot')
+LEFT_IDX = np.array([DICT_FEATURES['left'][k] for k in SIDE_KEYS], dtype=np.int32)
+RIGHT_IDX = np.array([DICT_FEATURES['right'][k] for k in SIDE_KEYS], dtype=np.int32)
+
+# arm (shoulder-elbow-wrist) and torso-leg (shoulder-hip-knee-foot) chains
+# as positions within SIDE_KEYS
+ARM_CHAIN = [0, 1, 2]
+LEG_CHAIN = [0, 3, 4, 5]
+
+# landmarks printed by the periodic full-body debug dump
+DEBUG_KEYS = ('l_shldr', 'r_shldr', 'l_hip', 'r_hip', 'l_knee', 'r_knee', 'l_foot', 'r_foot', 'nose')
+DEBUG_IDXS = (
+    DICT_FEATURES['left']['shoulder'], DICT_FEATURES['right']['shoulder'],
+    DICT_FEATURES['left']['hip'], DICT_FEATURES['right']['hip'],
+    DICT_FEATURES['left']['knee'], DICT_FEATURES['right']['knee'],
+    DICT_FEATURES['left']['foot'], DICT_FEATURES['right']['foot'],
+    DICT_FEATURES['nose'],
+)
+
+
+def landmarks_to_array(landmarks):
+    """Pack every landmark's normalized (x, y, visibility) into an (N, 3) float32 array.
+
+    Built once per frame and shared by the visibility check and the pixel
+    conversion.
+    """
+    return np.fromiter(
+        (v for lm in landmarks for v in (lm.x, lm.y, getattr(lm, 'visibility', 1.0))),
+        dtype=np.float32,
+        count=3 * len(landmarks),
+    ).reshape(-1, 3)
+
+
+def is_full_body_visible(lm_arr, tol=0.03):
     """Return True if key landmarks are inside the central image region.
 
-    landmarks: sequence of normalized landmarks (have .x and .y, and optionally .visibility)
+    lm_arr: (N, 3) array of normalized (x, y, visibility) from landmarks_to_array()
     tol: fraction margin around edges to consider (0.0..0.5)
     """
-    # indices to check: shoulders, hips, knees, wrists, nose (skip ankles)
-    indices = []
-    for side in ('left', 'right'):
-        for key, idx in DICT_FEATURES[side].items():
-            if key == 'ankle':
-                continue
-            indices.append(idx)
-    indices.append(DICT_FEATURES['nose'])
-
-    for idx in set(indices):
+    if len(lm_arr) <= _CHECK_IDX[-1]:
+        return False
+
+    # test all bounds at once instead of branching per landmark
+    arr = lm_arr[_CHECK_IDX]
+    x, y, vis = arr[:, 0], arr[:, 1], arr[:, 2]
+    return bool(((x >= tol) & (x <= 1.0 - tol) & (y >= tol) & (y <= 1.0 - tol) & (vis >= VIS_THRESH)).all())
+
+
+def landmarks_to_pixels(lm_arr, w, h):
+    """Scale the normalized x, y columns of lm_arr to an (N, 2) int32 pixel array.
+
+    Coordinates are rounded to the nearest pixel rather than truncated.
+    """
+    xy = lm_arr[:, :2] * (w, h)
+    return np.rint(xy, out=xy).astype(np.int32, copy=False)
+
+
+def to_inference_input(frame, out):
+    """Downscale a BGR frame into out (INFER_SIZE) and convert it to RGB in place."""
+    cv2.resize(frame, INFER_SIZE, dst=out, interpolation=cv2.INTER_AREA)
+    cv2.cvtColor(out, cv2.COLOR_BGR2RGB, dst=out)
+    return out
+
+
+def configure_low_latency_capture(cap):
+    """Keep only the newest frame queued and ask USB cameras for MJPG.
+
+    The default V4L2 queue holds several frames, so a slow pose.process()
+    would otherwise always work on a stale frame.
+    """
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+
+
+class LatestFrameReader:
+    """Read camera frames on a background thread.
+
+    Only the most recent frame is kept (1-slot queue), so pose inference on
+    the main thread overlaps with the next frame's capture instead of
+    waiting for it. read() mirrors cap.read() and returns (False, None)
+    once the camera stops delivering frames.
+
+    The reader owns the capture: the thread releases it when it exits, so
+    it is never released while a cap.read() is still in progress.
+    """
+
+    def __init__(self, cap):
+        self._cap = cap
+        self._queue = queue.Queue(maxsize=1)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _put_latest(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # drop the stale frame in favour of the newer one
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._queue.put_nowait(item)
+
+    def _run(self):
         try:
-            lm = landmarks[idx]
-        except Exception:
-            return False
+            while not self._stopped.is_set():
+                ret, frame = self._cap.read()
+                if not ret:
+                    self._put_latest(None)
+                    break
+                self._put_latest(frame)
+        finally:
+            self._cap.release()
+
+    def read(self, timeout=READ_TIMEOUT_S):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                frame = self._queue.get(timeout=READ_POLL_S)
+                break
+            except queue.Empty:
+                # capture thread died (or the camera stalled): stop waiting
+                if not self._thread.is_alive() or time.monotonic() >= deadline:
+                    return False, None
+        if frame is None:
+            return False, None
+        return True, frame
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join(timeout=1.0)
+
+
+class MotionGate:
+    """Cheap scene-change detector on a 64x48 grayscale thumbnail.
+
+    Used to skip pose inference while the camera looks at a static, empty
+    scene. Frames are compared with the last frame that ran inference, not
+    the previous frame, so slow motion still adds up and wakes inference;
+    inference is also forced after max_skip skipped frames in a row.
+    """
+
+    SIZE = (64, 48)
+
+    def __init__(self, threshold=MOTION_THRESH, max_skip=MAX_GATED_FRAMES):
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self._ref = None
+        self._skipped = 0
+
+    def reset(self):
+        """Forget the reference frame; the next can_skip() returns False."""
+        self._ref = None
+        self._skipped = 0
+
+    def can_skip(self, frame):
+        """Return True if inference can be skipped for frame.
+
+        When it returns False the caller runs inference, and frame becomes
+        the new reference.
+        """
+        small = cv2.cvtColor(cv2.resize(frame, self.SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        if (self._ref is not None and self._skipped < self.max_skip
+                and cv2.absdiff(small, self._ref).mean() < self.threshold):
+            self._skipped += 1
+            return True
+        self._ref = small
+        self._skipped = 0
+        return False
+
+
+class HudOverlay:
+    """Cached side / knee-angle / squat-count text in the top-left corner.
+
+    The glyphs are only rasterized again when one of the displayed values
+    changes; every other frame the cached patch is copied onto the frame
+    through its text mask.
+    """
 
-        x = getattr(lm, 'x', None)
-        y = getattr(lm, 'y', None)
-        if x is None or y is None:
-            return False
+    HEIGHT = 110
+    WIDTH = 320
 
-        if not (tol <= x <= 1.0 - tol and tol <= y <= 1.0 - tol):
-            return False
+    def __init__(self):
+        self._key = None
+        self._patch = np.zeros((self.HEIGHT, self.WIDTH, 3), dtype=np.uint8)
+        self._mask = np.zeros((self.HEIGHT, self.WIDTH), dtype=np.uint8)
+
+    def _render(self, side, knee_angle, squat_count):
+        self._patch.fill(0)
+        cv2.putText(self._patch, f"Side: {side}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        cv2.putText(self._patch, f"Knee angle: {knee_angle}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (180, 255, 180), 2)
+        cv2.putText(self._patch, f"Squats: {squat_count}", (10, 95), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 200, 255), 2)
+        cv2.cvtColor(self._patch, cv2.COLOR_BGR2GRAY, dst=self._mask)
+
+    def draw(self, frame, side, knee_angle, squat_count):
+        key = (side, int(knee_angle), squat_count)
+        if key != self._key:
+            self._key = key
+            self._render(*key)
+
+        roi = frame[:self.HEIGHT, :self.WIDTH]
+        rh, rw = roi.shape[:2]
+        cv2.copyTo(self._patch[:rh, :rw], self._mask[:rh, :rw], roi)
+
+
+def draw_skeleton(frame, pts):
+    """Draw one side's skeleton chains and joint markers.
+
+    pts: (6, 2) int32 pixel array ordered as SIDE_KEYS
+    """
+    cv2.polylines(frame, [pts[ARM_CHAIN], pts[LEG_CHAIN]], False, (200, 200, 255), 3)
+    for p in pts.tolist():
+        cv2.circle(frame, tuple(p), 5, (0, 255, 255), -1)
 
-        vis = getattr(lm, 'visibility', None)
-        VIS_THRESH = 0.15
-        if vis is not None and vis < VIS_THRESH:
-            return False
 
-    return True
+def extract_side(pix, side_idx):
+    """Return pixel (shoulder, elbow, wrist, hip, knee, foot) for LEFT_IDX or RIGHT_IDX."""
+    return tuple(map(tuple, pix[side_idx].tolist()))
 
 
 def run_legacy_squat_monitor(camera_index: int = 0, depth_angle: float = 100.0, stand_angle: float = 160.0):
@@ -97,6 +302,8 @@ def run_legacy_squat_monitor(camera_index: int = 0, depth_angle: float = 100.0,
         print('Unable to open camera')
         return
 
+    configure_low_latency_capture(cap)
+
     # Set camera properties for stability
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
@@ -112,28 +319,46 @@ def run_legacy_squat_monitor(camera_index: int = 0, depth_angle: float = 100.0,
     ready = False
     frame_count = 0
     window_name = 'Squat Monitor (Legacy API)'
-    full_body_visible_count = 0
-    FULL_BODY_REQUIRED = 5
-    ready = False
 
     print('Press ESC to exit. Squat detection (Legacy Solutions API) running...')
     print('Opening camera window...')
+    cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+    cv2.resizeWindow(window_name, 960, 720)
+
+    reader = LatestFrameReader(cap)
+    hud = HudOverlay()
+    motion_gate = MotionGate()
+    result = None
+    idle_frames = 0
+    # mirror buffer reused across frames (sized on the first frame) and the
+    # fixed-size, downscaled RGB inference input
+    flip_buf = None
+    infer_buf = np.empty((INFER_SIZE[1], INFER_SIZE[0], 3), dtype=np.uint8)
 
     try:
         while True:
-            ret, frame = cap.read()
+            ret, frame = reader.read()
             if not ret:
                 print(f'[Frame {frame_count}] Failed to read frame from camera')
                 break
 
             frame_count += 1
             h, w, _ = frame.shape
+            if flip_buf is None or flip_buf.shape != frame.shape:
+                flip_buf = np.empty_like(frame)
             
             # Flip frame for selfie view (mirror)
-            frame = cv2.flip(frame, 1)
+            frame = cv2.flip(frame, 1, dst=flip_buf)
             
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result = pose.process(rgb)
+            # skip inference (reusing the last result) while nobody has been
+            # framed for a while and the scene is not changing
+            idle_frames = 0 if ready else idle_frames + 1
+            gating = idle_frames > IDLE_FRAMES_BEFORE_GATING
+            if not gating:
+                motion_gate.reset()
+            if result is None or not (gating and motion_gate.can_skip(frame)):
+                to_inference_input(frame, infer_buf)
+                result = pose.process(infer_buf)
 
             # Display frame info
             cv2.putText(frame, f'Frame: {frame_count} | Size: {w}x{h}', (10, frame.shape[0] - 20), 
@@ -141,44 +366,32 @@ def run_legacy_squat_monitor(camera_index: int = 0, depth_angle: float = 100.0,
 
             if result.pose_landmarks:
                 landmarks = result.pose_landmarks.landmark
+                lm_arr = landmarks_to_array(landmarks)
 
-                # check full-body visibility
-                if is_full_body_visible(landmarks, tol=0.03):
-                    full_body_visible_count += 1
-                else:
-                    full_body_visible_count = 0
-
-                if full_body_visible_count >= FULL_BODY_REQUIRED:
-                    if not ready:
-                        print('Full body detected. Starting squat count.')
-                    ready = True
-                else:
-                    # periodic debug print of key landmarks when not ready
-                    if frame_count % 30 == 0 or full_body_visible_count == 0:
-                        keys = ['l_shldr','r_shldr','l_hip','r_hip','l_knee','r_knee','l_foot','r_foot','nose']
-                        idxs = [
-                            DICT_FEATURES['left']['shoulder'], DICT_FEATURES['right']['shoulder'],
-                            DICT_FEATURES['left']['hip'], DICT_FEATURES['right']['hip'],
-                            DICT_FEATURES['left']['knee'], DICT_FEATURES['right']['knee'],
-                            DICT_FEATURES['left']['foot'], DICT_FEATURES['right']['foot'],
-                            DICT_FEATURES['nose']
-                        ]
-                        print(f'Full-body check debug (legacy) frame {frame_count}:')
-                        for name, idx in zip(keys, idxs):
-                            lm = landmarks[idx]
-                            print(f'  {name}: x={lm.x:.3f} y={lm.y:.3f} vis={getattr(lm, "visibility", None)}')
-                    ready = False
-
-                def to_px(lm):
-                    return (int(lm.x * w), int(lm.y * h))
-
-                def extract_side(side):
-                    f = DICT_FEATURES[side]
-                    return tuple(to_px(landmarks[f[k]]) for k in ('shoulder', 'elbow', 'wrist', 'hip', 'knee', 'foot'))
+                # check full-body visibility; once ready, only re-validate periodically
+                if not ready or frame_count % READY_RECHECK_FRAMES == 0:
+                    if is_full_body_visible(lm_arr, tol=0.03):
+                        full_body_visible_count += 1
+                    else:
+                        full_body_visible_count = 0
+
+                    if full_body_visible_count >= FULL_BODY_REQUIRED:
+                        if not ready:
+                            print('Full body detected. Starting squat count.')
+                        ready = True
+                    else:
+                        # periodic debug print of key landmarks when not ready
+                        if frame_count % 30 == 0 or full_body_visible_count == 0:
+                            print(f'Full-body check debug (legacy) frame {frame_count}:')
+                            for name, idx in zip(DEBUG_KEYS, DEBUG_IDXS):
+                                lm = landmarks[idx]
+                                print(f'  {name}: x={lm.x:.3f} y={lm.y:.3f} vis={getattr(lm, "visibility", None)}')
+                        ready = False
 
                 try:
-                    ls = extract_side('left')
-                    rs = extract_side('right')
+                    pix = landmarks_to_pixels(lm_arr, w, h)
+                    ls = extract_side(pix, LEFT_IDX)
+                    rs = extract_side(pix, RIGHT_IDX)
                 except Exception:
                     ls = rs = None
 
@@ -192,19 +405,13 @@ def run_legacy_squat_monitor(camera_index: int = 0, depth_angle: float = 100.0,
                     if left_knee < right_knee:
                         knee_angle = left_knee
                         side = 'left'
-                        sh, el, wr, hp, kn, ft = ls
+                        side_idx = LEFT_IDX
                     else:
                         knee_angle = right_knee
                         side = 'right'
-                        sh, el, wr, hp, kn, ft = rs
+                        side_idx = RIGHT_IDX
 
-                    cv2.line(frame, sh, el, (200, 200, 255), 3)
-                    cv2.line(frame, el, wr, (200, 200, 255), 3)
-                    cv2.line(frame, sh, hp, (200, 200, 255), 3)
-                    cv2.line(frame, hp, kn, (200, 200, 255), 3)
-                    cv2.line(frame, kn, ft, (200, 200, 255), 3)
-                    for p in (sh, el, wr, hp, kn, ft):
-                        cv2.circle(frame, p, 5, (0, 255, 255), -1)
+                    draw_skeleton(frame, pix[side_idx])
 
                     if state == 'up' and knee_angle < depth_angle:
                         state = 'down'
@@ -215,18 +422,13 @@ def run_legacy_squat_monitor(camera_index: int = 0, depth_angle: float = 100.0,
                         state = 'up'
                         reached_depth = False
 
-                    cv2.putText(frame, f"Side: {side}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                    cv2.putText(frame, f"Knee angle: {int(knee_angle)}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (180, 255, 180), 2)
-                    cv2.putText(frame, f"Squats: {squat_count}", (10, 95), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 200, 255), 2)
+                    hud.draw(frame, side, knee_angle, squat_count)
             else:
                 cv2.putText(frame, "No pose detected. Get in frame.", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
 
             if not ready:
                 cv2.putText(frame, "Position your full body in the frame to start counting", (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
 
-            # Create window and display
-            cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-            cv2.resizeWindow(window_name, 960, 720)
             cv2.imshow(window_name, frame)
             
             key = cv2.waitKey(1) & 0xFF
@@ -238,7 +440,7 @@ def run_legacy_squat_monitor(camera_index: int = 0, depth_angle: float = 100.0,
         import traceback
         traceback.print_exc()
     finally:
-        cap.release()
+        reader.stop()
         cv2.destroyAllWindows()
         print('Monitor stopped.')
 
@@ -254,6 +456,8 @@ def run_tasks_squat_monitor(model_path: str, camera_index: int = 0, depth_angle:
         print('Unable to open camera')
         return
 
+    configure_low_latency_capture(cap)
+
     base_options = tasks_core.BaseOptions(model_asset_path=model_path)
     options = vision.PoseLandmarkerOptions(
         base_options=base_options,
@@ -275,60 +479,65 @@ def run_tasks_squat_monitor(model_path: str, camera_index: int = 0, depth_angle:
 
     print('Press ESC to exit. Squat detection (Tasks API) running...')
 
+    reader = LatestFrameReader(cap)
+    hud = HudOverlay()
+    motion_gate = MotionGate()
+    result = None
+    idle_frames = 0
+    # fixed-size, downscaled RGB inference input reused across frames
+    infer_buf = np.empty((INFER_SIZE[1], INFER_SIZE[0], 3), dtype=np.uint8)
+
     try:
         while True:
-            ret, frame = cap.read()
+            ret, frame = reader.read()
             if not ret:
                 break
 
             frame_count += 1
 
             h, w, _ = frame.shape
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            mp_img = Image(ImageFormat.SRGB, rgb)
 
-            timestamp_ms = int(time.time() * 1000)
-            result = landmarker.detect_for_video(mp_img, timestamp_ms)
+            # skip inference (reusing the last result) while nobody has been
+            # framed for a while and the scene is not changing
+            idle_frames = 0 if ready else idle_frames + 1
+            gating = idle_frames > IDLE_FRAMES_BEFORE_GATING
+            if not gating:
+                motion_gate.reset()
+            if result is None or not (gating and motion_gate.can_skip(frame)):
+                to_inference_input(frame, infer_buf)
+                mp_img = Image(ImageFormat.SRGB, infer_buf)
+
+                # MediaPipe requires strictly increasing timestamps; the wall clock can jump
+                timestamp_ms = time.monotonic_ns() // 1_000_000
+                result = landmarker.detect_for_video(mp_img, timestamp_ms)
 
             if result.pose_landmarks:
                 landmarks = result.pose_landmarks[0]
+                lm_arr = landmarks_to_array(landmarks)
 
-                # check full-body visibility
-                if is_full_body_visible(landmarks, tol=0.03):
-                    full_body_visible_count += 1
-                else:
-                    full_body_visible_count = 0
-
-                if full_body_visible_count >= FULL_BODY_REQUIRED:
-                    if not ready:
-                        print('Full body detected (Tasks API). Starting squat count.')
-                    ready = True
-                else:
-                    if frame_count % 30 == 0 or full_body_visible_count == 0:
-                        keys = ['l_shldr','r_shldr','l_hip','r_hip','l_knee','r_knee','l_foot','r_foot','nose']
-                        idxs = [
-                            DICT_FEATURES['left']['shoulder'], DICT_FEATURES['right']['shoulder'],
-                            DICT_FEATURES['left']['hip'], DICT_FEATURES['right']['hip'],
-                            DICT_FEATURES['left']['knee'], DICT_FEATURES['right']['knee'],
-                            DICT_FEATURES['left']['foot'], DICT_FEATURES['right']['foot'],
-                            DICT_FEATURES['nose']
-                        ]
-                        print(f'Full-body check debug (tasks) frame {frame_count}:')
-                        for name, idx in zip(keys, idxs):
-                            lm = landmarks[idx]
-                            print(f'  {name}: x={lm.x:.3f} y={lm.y:.3f} vis={getattr(lm, "visibility", None)}')
-                    ready = False
-
-                def to_px(lm):
-                    return (int(lm.x * w), int(lm.y * h))
-
-                def extract_side(side):
-                    f = DICT_FEATURES[side]
-                    return tuple(to_px(landmarks[f[k]]) for k in ('shoulder', 'elbow', 'wrist', 'hip', 'knee', 'foot'))
+                # check full-body visibility; once ready, only re-validate periodically
+                if not ready or frame_count % READY_RECHECK_FRAMES == 0:
+                    if is_full_body_visible(lm_arr, tol=0.03):
+                        full_body_visible_count += 1
+                    else:
+                        full_body_visible_count = 0
+
+                    if full_body_visible_count >= FULL_BODY_REQUIRED:
+                        if not ready:
+                            print('Full body detected (Tasks API). Starting squat count.')
+                        ready = True
+                    else:
+                        if frame_count % 30 == 0 or full_body_visible_count == 0:
+                            print(f'Full-body check debug (tasks) frame {frame_count}:')
+                            for name, idx in zip(DEBUG_KEYS, DEBUG_IDXS):
+                                lm = landmarks[idx]
+                                print(f'  {name}: x={lm.x:.3f} y={lm.y:.3f} vis={getattr(lm, "visibility", None)}')
+                        ready = False
 
                 try:
-                    ls = extract_side('left')
-                    rs = extract_side('right')
+                    pix = landmarks_to_pixels(lm_arr, w, h)
+                    ls = extract_side(pix, LEFT_IDX)
+                    rs = extract_side(pix, RIGHT_IDX)
                 except Exception:
                     ls = rs = None
 
@@ -342,19 +551,13 @@ def run_tasks_squat_monitor(model_path: str, camera_index: int = 0, depth_angle:
                     if left_knee < right_knee:
                         knee_angle = left_knee
                         side = 'left'
-                        sh, el, wr, hp, kn, ft = ls
+                        side_idx = LEFT_IDX
                     else:
                         knee_angle = right_knee
                         side = 'right'
-                        sh, el, wr, hp, kn, ft = rs
+                        side_idx = RIGHT_IDX
 
-                    cv2.line(frame, sh, el, (200, 200, 255), 3)
-                    cv2.line(frame, el, wr, (200, 200, 255), 3)
-                    cv2.line(frame, sh, hp, (200, 200, 255), 3)
-                    cv2.line(frame, hp, kn, (200, 200, 255), 3)
-                    cv2.line(frame, kn, ft, (200, 200, 255), 3)
-                    for p in (sh, el, wr, hp, kn, ft):
-                        cv2.circle(frame, p, 5, (0, 255, 255), -1)
+                    draw_skeleton(frame, pix[side_idx])
 
                     if state == 'up' and knee_angle < depth_angle:
                         state = 'down'
@@ -365,9 +568,7 @@ def run_tasks_squat_monitor(model_path: str, camera_index: int = 0, depth_angle:
                         state = 'up'
                         reached_depth = False
 
-                    cv2.putText(frame, f"Side: {side}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                    cv2.putText(frame, f"Knee angle: {int(knee_angle)}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (180, 255, 180), 2)
-                    cv2.putText(frame, f"Squats: {squat_count}", (10, 95), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (50, 200, 255), 2)
+                    hud.draw(frame, side, knee_angle, squat_count)
 
             if not ready:
                 cv2.putText(frame, "Position your full body in the frame to start counting", (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
@@ -376,7 +577,7 @@ def run_tasks_squat_monitor(model_path: str, camera_index: int = 0, depth_angle:
             if cv2.waitKey(1) & 0xFF == 27:
                 break
     finally:
-        cap.release()
+        reader.stop()
         cv2.destroyAllWindows()
         landmarker.close()
 
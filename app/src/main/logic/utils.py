@@ -1,4 +1,14 @@
-import numpy as np
+from math import atan2, degrees
+
+# Numba is optional: when it is not installed the scalar kernels below run
+# as plain Python.
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        def decorator(fn):
+            return fn
+        return decorator
 
 
 def get_landmark_array(landmarks, key, frame_width, frame_height):
@@ -6,11 +16,12 @@ def get_landmark_array(landmarks, key, frame_width, frame_height):
 
     landmarks: sequence of landmark objects with .x and .y
     key: int index of the landmark
+
+    Returns a plain tuple, which OpenCV drawing calls and angle_at_point
+    accept directly without a per-call ndarray allocation.
     """
     lm = landmarks[key]
-    x = int(lm.x * frame_width)
-    y = int(lm.y * frame_height)
-    return np.array([x, y])
+    return (int(lm.x * frame_width), int(lm.y * frame_height))
 
 
 def get_landmark_features(landmarks, dict_features, feature, frame_width, frame_height):
@@ -36,24 +47,34 @@ def get_landmark_features(landmarks, dict_features, feature, frame_width, frame_
     raise ValueError("feature needs to be either 'nose', 'left' or 'right'")
 
 
-def find_angle(p1, p2, ref_pt=np.array([0, 0])):
+# shared immutable default origin for find_angle
+_ZERO = (0, 0)
+
+
+def find_angle(p1, p2, ref_pt=_ZERO):
     """Compute angle (in degrees) between vectors (p1-ref_pt) and (p2-ref_pt).
 
     Returns int degrees. Guards against zero-length vectors.
     """
-    v1 = np.array(p1, dtype=float) - np.array(ref_pt, dtype=float)
-    v2 = np.array(p2, dtype=float) - np.array(ref_pt, dtype=float)
+    rx, ry = ref_pt
+    dx1, dy1 = p1[0] - rx, p1[1] - ry
+    dx2, dy2 = p2[0] - rx, p2[1] - ry
+
+    # atan2(cross, dot) is range-safe; zero-length vectors yield 0.
+    return int(abs(degrees(atan2(dx1 * dy2 - dy1 * dx2, dx1 * dx2 + dy1 * dy2))))
+
+
+@njit('f8(f8,f8,f8,f8,f8,f8)', cache=True, fastmath=True)
+def angle_at_point_scalar(ax, ay, bx, by, cx, cy):
+    """Angle (degrees) at (bx, by) formed by (ax, ay)-(bx, by)-(cx, cy)."""
+    dx1, dy1 = ax - bx, ay - by
+    dx2, dy2 = cx - bx, cy - by
+    return abs(degrees(atan2(dx1 * dy2 - dy1 * dx2, dx1 * dx2 + dy1 * dy2)))
 
-    n1 = np.linalg.norm(v1)
-    n2 = np.linalg.norm(v2)
-    if n1 == 0 or n2 == 0:
-        return 0
 
-    cos_theta = np.dot(v1, v2) / (n1 * n2)
-    cos_theta = np.clip(cos_theta, -1.0, 1.0)
-    theta = np.arccos(cos_theta)
-    deg = theta * 180.0 / np.pi
-    return int(deg)
+# the explicit signature compiles eagerly; this call makes sure the first
+# real frame never pays for compilation or cache loading
+angle_at_point_scalar(0.0, 1.0, 0.0, 0.0, 1.0, 0.0)
 
 
 def angle_at_point(a, b, c):
@@ -61,18 +82,4 @@ def angle_at_point(a, b, c):
 
     Useful for joint angles (e.g., hip-knee-ankle -> angle at knee).
     """
-    a = np.array(a, dtype=float)
-    b = np.array(b, dtype=float)
-    c = np.array(c, dtype=float)
-
-    v1 = a - b
-    v2 = c - b
-    n1 = np.linalg.norm(v1)
-    n2 = np.linalg.norm(v2)
-    if n1 == 0 or n2 == 0:
-        return 0
-
-    cos_theta = np.dot(v1, v2) / (n1 * n2)
-    cos_theta = np.clip(cos_theta, -1.0, 1.0)
-    theta = np.arccos(cos_theta)
-    return float(theta * 180.0 / np.pi)
+    return angle_at_point_scalar(a[0], a[1], b[0], b[1], c[0], c[1])
@@ -2,8 +2,10 @@
 Angle calculation utilities for pose analysis.
 Implements LearnOpenCV AI Fitness Trainer angle calculations.
 """
+from math import atan2, degrees, hypot
+from typing import Final, Tuple, List
+
 import numpy as np
-from typing import Tuple, List
 
 
 def angle_at_point(a: Tuple[float, float], b: Tuple[float, float], c: Tuple[float, float]) -> float:
@@ -19,24 +21,16 @@ def angle_at_point(a: Tuple[float, float], b: Tuple[float, float], c: Tuple[floa
     Returns:
         Angle in degrees (0-180)
     """
-    a = np.array(a, dtype=float)
-    b = np.array(b, dtype=float)
-    c = np.array(c, dtype=float)
-    
-    v1 = a - b
-    v2 = c - b
-    
-    n1 = np.linalg.norm(v1)
-    n2 = np.linalg.norm(v2)
-    
-    if n1 == 0 or n2 == 0:
-        return 0.0
+    ax, ay = a
+    bx, by = b
+    cx, cy = c
     
-    cos_theta = np.dot(v1, v2) / (n1 * n2)
-    cos_theta = np.clip(cos_theta, -1.0, 1.0)
-    theta = np.arccos(cos_theta)
+    dx1, dy1 = ax - bx, ay - by
+    dx2, dy2 = cx - bx, cy - by
     
-    return float(theta * 180.0 / np.pi)
+    # atan2(cross, dot) is range-safe, so no clip/arccos is needed.
+    # Zero-length vectors give atan2(0, 0) == 0.0.
+    return abs(degrees(atan2(dx1 * dy2 - dy1 * dx2, dx1 * dx2 + dy1 * dy2)))
 
 
 def angle_with_vertical(p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
@@ -53,24 +47,14 @@ def angle_with_vertical(p1: Tuple[float, float], p2: Tuple[float, float]) -> flo
     Returns:
         Angle in degrees (0 = perfectly vertical, 90 = horizontal)
     """
-    p1 = np.array(p1, dtype=float)
-    p2 = np.array(p2, dtype=float)
-    
-    # Vector from p1 to p2
-    line_vec = p2 - p1
-    
-    # Vertical vector (pointing down in image coordinates)
-    vertical = np.array([0, 1], dtype=float)
-    
-    line_norm = np.linalg.norm(line_vec)
-    if line_norm == 0:
-        return 0.0
+    x1, y1 = p1
+    x2, y2 = p2
     
-    cos_theta = np.dot(line_vec, vertical) / line_norm
-    cos_theta = np.clip(cos_theta, -1.0, 1.0)
-    theta = np.arccos(cos_theta)
+    # Vector from p1 to p2, measured against the downward vertical (0, 1):
+    # cross = |dx|, dot = dy.
+    dx, dy = x2 - x1, y2 - y1
     
-    return float(theta * 180.0 / np.pi)
+    return degrees(atan2(abs(dx), dy))
 
 
 def offset_angle(nose: Tuple[float, float], 
@@ -89,37 +73,51 @@ def offset_angle(nose: Tuple[float, float],
         Offset angle in degrees. Low values = side view (good for squat).
         High values = frontal view (not ideal for squat analysis).
     """
-    nose = np.array(nose, dtype=float)
-    left_shoulder = np.array(left_shoulder, dtype=float)
-    right_shoulder = np.array(right_shoulder, dtype=float)
+    lx, ly = left_shoulder
+    rx, ry = right_shoulder
     
-    # Midpoint of shoulders
-    shoulder_mid = (left_shoulder + right_shoulder) / 2
-    
-    # Vector from shoulder midpoint to nose
-    to_nose = nose - shoulder_mid
-    
-    # Shoulder line vector
-    shoulder_line = right_shoulder - left_shoulder
-    
-    # We want to measure how much the nose is in front vs to the side
-    # Use cross product to determine offset
-    shoulder_width = np.linalg.norm(shoulder_line)
+    # Degenerate pose: both shoulders project onto the same point
+    shoulder_width = hypot(rx - lx, ry - ly)
     if shoulder_width == 0:
         return 0.0
     
-    # Calculate how far nose is from shoulder midpoint in x-direction
-    # relative to shoulder width
-    nose_offset = abs(to_nose[0]) / shoulder_width
-    
-    # Convert to angle (approximate)
+    # Using the approach from LearnOpenCV: angle between nose and shoulder line
     # If nose is directly above shoulder midpoint, offset is low (side view)
     # If nose is far from midpoint in x, person is at an angle
-    
-    # Using the approach from LearnOpenCV: angle between nose and shoulder line
     return angle_at_point(left_shoulder, nose, right_shoulder)
 
 
+def angle_at_point_batch(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """
+    angle_at_point for N triplets at once.
+    
+    Args:
+        a, b, c: (N, 2) arrays of points; the angle is measured at b
+    
+    Returns:
+        (N,) array of angles in degrees (0-180)
+    """
+    d1 = np.asarray(a, dtype=np.float64) - b
+    d2 = np.asarray(c, dtype=np.float64) - b
+    cross = d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]
+    dot = d1[:, 0] * d2[:, 0] + d1[:, 1] * d2[:, 1]
+    return np.abs(np.degrees(np.arctan2(cross, dot)))
+
+
+def angle_with_vertical_batch(p1: np.ndarray, p2: np.ndarray) -> np.ndarray:
+    """
+    angle_with_vertical for N segments at once.
+    
+    Args:
+        p1, p2: (N, 2) arrays of upper and lower points
+    
+    Returns:
+        (N,) array of angles in degrees (0 = vertical, 90 = horizontal)
+    """
+    d = np.asarray(p2, dtype=np.float64) - p1
+    return np.degrees(np.arctan2(np.abs(d[:, 0]), d[:, 1]))
+
+
 def get_landmark_coords(landmarks: List[dict], index: int, 
                         frame_width: float = 1.0, 
                         frame_height: float = 1.0) -> Tuple[float, float]:
@@ -145,20 +143,39 @@ def get_landmark_coords(landmarks: List[dict], index: int,
     return (x, y)
 
 
-# MediaPipe landmark indices
+# MediaPipe landmark indices.
+# Module-level constants resolve with a single global lookup in hot paths;
+# LandmarkIndex keeps the namespaced spelling for existing callers.
+NOSE: Final[int] = 0
+LEFT_SHOULDER: Final[int] = 11
+RIGHT_SHOULDER: Final[int] = 12
+LEFT_ELBOW: Final[int] = 13
+RIGHT_ELBOW: Final[int] = 14
+LEFT_WRIST: Final[int] = 15
+RIGHT_WRIST: Final[int] = 16
+LEFT_HIP: Final[int] = 23
+RIGHT_HIP: Final[int] = 24
+LEFT_KNEE: Final[int] = 25
+RIGHT_KNEE: Final[int] = 26
+LEFT_ANKLE: Final[int] = 27
+RIGHT_ANKLE: Final[int] = 28
+LEFT_FOOT: Final[int] = 31
+RIGHT_FOOT: Final[int] = 32
+
+
 class LandmarkIndex:
-    NOSE = 0
-    LEFT_SHOULDER = 11
-    RIGHT_SHOULDER = 12
-    LEFT_ELBOW = 13
-    RIGHT_ELBOW = 14
-    LEFT_WRIST = 15
-    RIGHT_WRIST = 16
-    LEFT_HIP = 23
-    RIGHT_HIP = 24
-    LEFT_KNEE = 25
-    RIGHT_KNEE = 26
-    LEFT_ANKLE = 27
-    RIGHT_ANKLE = 28
-    LEFT_FOOT = 31
-    RIGHT_FOOT = 32
+    NOSE = NOSE
+    LEFT_SHOULDER = LEFT_SHOULDER
+    RIGHT_SHOULDER = RIGHT_SHOULDER
+    LEFT_ELBOW = LEFT_ELBOW
+    RIGHT_ELBOW = RIGHT_ELBOW
+    LEFT_WRIST = LEFT_WRIST
+    RIGHT_WRIST = RIGHT_WRIST
+    LEFT_HIP = LEFT_HIP
+    RIGHT_HIP = RIGHT_HIP
+    LEFT_KNEE = LEFT_KNEE
+    RIGHT_KNEE = RIGHT_KNEE
+    LEFT_ANKLE = LEFT_ANKLE
+    RIGHT_ANKLE = RIGHT_ANKLE
+    LEFT_FOOT = LEFT_FOOT
+    RIGHT_FOOT = RIGHT_FOOT
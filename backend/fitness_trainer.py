@@ -9,20 +9,30 @@ Implements:
 - Inactivity detection and counter reset
 - Frontal view warning
 """
+import math
 import time
-from typing import List, Tuple, Optional, Dict
+from bisect import bisect_left
+import numpy as np
+from typing import List, Tuple, Optional, Union
 from dataclasses import dataclass, field
 
 from angle_utils import (
-    angle_at_point, 
-    angle_with_vertical, 
+    angle_at_point,
+    angle_with_vertical,
     offset_angle,
-    get_landmark_coords,
-    LandmarkIndex
+    NOSE,
+    LEFT_SHOULDER,
+    RIGHT_SHOULDER,
+    LEFT_HIP,
+    RIGHT_HIP,
+    LEFT_KNEE,
+    RIGHT_KNEE,
+    LEFT_ANKLE,
+    RIGHT_ANKLE
 )
 from models import (
     PoseLandmark, 
-    AnalysisResult, 
+    AnalysisResultFast,
     WorkoutSummary,
     SquatState, 
     FeedbackType, 
@@ -92,20 +102,245 @@ PRO_CONFIG = ThresholdConfig(
 )
 
 
+# Landmarks that must be in frame before reps are counted
+KEY_INDICES = np.array([
+    LEFT_SHOULDER, RIGHT_SHOULDER,
+    LEFT_HIP, RIGHT_HIP,
+    LEFT_KNEE, RIGHT_KNEE,
+    LEFT_ANKLE, RIGHT_ANKLE,
+    NOSE,
+], dtype=np.intp)
+KEY_NAMES = (
+    "L.Shoulder", "R.Shoulder",
+    "L.Hip", "R.Hip",
+    "L.Knee", "R.Knee",
+    "L.Ankle", "R.Ankle",
+    "Nose",
+)
+# Plain ints for indexing landmark lists one frame at a time
+_KEY_LIST = tuple(KEY_INDICES.tolist())
+
+
+def _key_landmarks(landmarks: Union[List[dict], np.ndarray]) -> Tuple[list, list]:
+    """
+    (x, y) points and visibilities of the KEY_INDICES landmarks, in order.
+    Reads only those 9 landmarks; a single frame is cheaper to walk in
+    Python than to pack into arrays.
+    """
+    if isinstance(landmarks, np.ndarray):
+        rows = landmarks[KEY_INDICES].tolist()
+        return [(r[0], r[1]) for r in rows], [r[3] for r in rows]
+    keys = [landmarks[i] for i in _KEY_LIST]
+    return ([(lm['x'], lm['y']) for lm in keys],
+            [lm.get('visibility', 1.0) for lm in keys])
+
+
+# Angles measured at vertex B between (A - B) and (C - B), as (A, B, C):
+# offset angle (nose between shoulders), left knee, right knee.
+_JOINT_A = np.array([LEFT_SHOULDER, LEFT_HIP, RIGHT_HIP], dtype=np.intp)
+_JOINT_B = np.array([NOSE, LEFT_KNEE, RIGHT_KNEE], dtype=np.intp)
+_JOINT_C = np.array([RIGHT_SHOULDER, LEFT_ANKLE, RIGHT_ANKLE], dtype=np.intp)
+
+# Segments (P1 -> P2) measured against the downward vertical:
+# shoulder-hip, hip-knee, knee-ankle for the left then the right side.
+_SEG_P1 = np.array([LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE,
+                    RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE], dtype=np.intp)
+_SEG_P2 = np.array([LEFT_HIP, LEFT_KNEE, LEFT_ANKLE,
+                    RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE], dtype=np.intp)
+
+
+def _compute_all_angles(points: list):
+    """
+    Compute every per-frame angle for both sides with the scalar helpers;
+    for 9 angles this beats any per-frame array setup.
+    
+    Args:
+        points: (x, y) of the KEY_INDICES landmarks, from _key_landmarks()
+    
+    Returns:
+        (offset, left_knee, right_knee,
+         (hip_vert, knee_vert, ankle_vert) left,
+         (hip_vert, knee_vert, ankle_vert) right) as Python floats
+    """
+    l_shoulder, r_shoulder, l_hip, r_hip, l_knee, r_knee, l_ankle, r_ankle, nose = points
+    return (
+        offset_angle(nose, l_shoulder, r_shoulder),
+        angle_at_point(l_hip, l_knee, l_ankle),
+        angle_at_point(r_hip, r_knee, r_ankle),
+        (angle_with_vertical(l_shoulder, l_hip),
+         angle_with_vertical(l_hip, l_knee),
+         angle_with_vertical(l_knee, l_ankle)),
+        (angle_with_vertical(r_shoulder, r_hip),
+         angle_with_vertical(r_hip, r_knee),
+         angle_with_vertical(r_knee, r_ankle)),
+    )
+
+
+def _compute_all_angles_batch(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    Every angle of N frames in one vectorized pass, for analyze_batch.
+    Same math as angle_at_point / angle_with_vertical / offset_angle
+    (a vertical angle is the joint angle against the vector (0, 1)).
+    
+    Args:
+        xs, ys: (N, 33) landmark coordinates
+    
+    Returns:
+        (N, 9) array: offset, left knee, right knee, then the left and the
+        right (hip, knee, ankle) vertical angles
+    """
+    dx1 = xs[:, _JOINT_A] - xs[:, _JOINT_B]
+    dy1 = ys[:, _JOINT_A] - ys[:, _JOINT_B]
+    dx2 = xs[:, _JOINT_C] - xs[:, _JOINT_B]
+    dy2 = ys[:, _JOINT_C] - ys[:, _JOINT_B]
+    seg_dx = xs[:, _SEG_P2] - xs[:, _SEG_P1]
+    seg_dy = ys[:, _SEG_P2] - ys[:, _SEG_P1]
+    
+    cross = np.concatenate((dx1 * dy2 - dy1 * dx2, seg_dx), axis=1)
+    dot = np.concatenate((dx1 * dx2 + dy1 * dy2, seg_dy), axis=1)
+    return np.abs(np.degrees(np.arctan2(cross, dot)))
+
+
+# Feedback rules in priority order (severe issues first), indexed by the bit
+# position used in _make_feedback_fn:
+_FEEDBACK_TABLE: Tuple[Tuple[FeedbackType, str, bool], ...] = (
+    # Knee falling over toes (severe)
+    (FeedbackType.KNEE_OVER_TOES, "Knee falling over toes! Push hips back.", True),
+    # Deep squat (severe) - only in s3 state
+    (FeedbackType.DEEP_SQUAT, "Too deep! Don't go past parallel.", True),
+    # Bend forward (torso too upright)
+    (FeedbackType.BEND_FORWARD, "Lean your torso forward slightly.", False),
+    # Bend backwards (torso too forward)
+    (FeedbackType.BEND_BACKWARDS, "Straighten your back, lean less forward.", False),
+    # Lower hips (only during descent s1->s2)
+    (FeedbackType.LOWER_HIPS, "Lower your hips more!", False),
+    # Good form - encouraging feedback based on state
+    (FeedbackType.READY, "Ready - squat down!", False),
+    (FeedbackType.NONE, "Good depth! Now stand up.", False),
+    (FeedbackType.NONE, "", False),
+)
+
+
+# FitnessTrainer._feedback_counts is indexed directly by FeedbackType
+_FEEDBACK_TYPES = tuple(FeedbackType)
+_NO_FEEDBACK = (0,) * len(_FEEDBACK_TYPES)
+
+# Longest frame interval credited to active time
+_MAX_FRAME_DT_NS = 1_000_000_000
+
+# Bits of FitnessTrainer._seen_states
+_SEEN_S2 = 1
+_SEEN_S3 = 2
+
+
+def _build_state_table(cfg: ThresholdConfig) -> Tuple[Tuple[float, ...], tuple]:
+    """
+    Build a (bins, table) lookup for the knee-vertical state thresholds.
+    
+    bisect_left(bins, angle) indexes table, where None marks the gaps
+    between state ranges (keep the previous state):
+        angle <= s1_max             -> S1
+        s1_max < angle < s2_min     -> gap
+        s2_min <= angle <= s2_max   -> S2
+        s2_max < angle < s3_min     -> gap
+        angle >= s3_min             -> S3 (also beyond s3_max)
+    Lower bounds are inclusive, so they are stored as the next float below.
+    """
+    bins = (
+        cfg.state_s1_max,
+        math.nextafter(cfg.state_s2_min, -math.inf),
+        cfg.state_s2_max,
+        math.nextafter(cfg.state_s3_min, -math.inf),
+    )
+    table = (SquatState.S1_NORMAL, None, SquatState.S2_TRANSITION, None, SquatState.S3_PASS)
+    return bins, table
+
+
+def _make_state_fn(cfg: ThresholdConfig):
+    """
+    Specialize the state lookup for one config.
+    
+    Returns determine_state(knee_vertical, current_state) -> SquatState with
+    the threshold table bound as closure constants.
+    """
+    bins, table = _build_state_table(cfg)
+    
+    def determine_state(knee_vertical: float, current_state: SquatState) -> SquatState:
+        state = table[bisect_left(bins, knee_vertical)]
+        # In the gap between states - use previous state
+        return current_state if state is None else state
+    
+    return determine_state
+
+
+def _make_feedback_fn(cfg: ThresholdConfig):
+    """
+    Specialize the feedback rules for one config.
+    
+    Returns determine_feedback(state, hip_vertical, knee_vertical,
+    ankle_vertical, is_going_down) -> (feedback_type, message, is_severe)
+    with every threshold bound as a closure constant.
+    """
+    knee_over_toes = cfg.knee_over_toes
+    deep_squat = cfg.deep_squat
+    hip_min = cfg.hip_vertical_min
+    hip_max = cfg.hip_vertical_max
+    lower_hips_min = cfg.lower_hips_min
+    lower_hips_max = cfg.lower_hips_max
+    S1, S2, S3 = SquatState.S1_NORMAL, SquatState.S2_TRANSITION, SquatState.S3_PASS
+    table = _FEEDBACK_TABLE
+    
+    def determine_feedback(state: SquatState, hip_vertical: float, knee_vertical: float,
+                           ankle_vertical: float, is_going_down: bool):
+        # Evaluate every rule, then pick the highest-priority hit (lowest
+        # set bit) from _FEEDBACK_TABLE; bit 7 is the always-true fallback.
+        mask = (
+            (ankle_vertical > knee_over_toes)
+            | ((state == S3 and knee_vertical > deep_squat) << 1)
+            | ((hip_vertical < hip_min) << 2)
+            | ((hip_vertical > hip_max) << 3)
+            | ((is_going_down and state == S2
+                and lower_hips_min <= knee_vertical <= lower_hips_max) << 4)
+            | ((state == S1) << 5)
+            | ((state == S3) << 6)
+            | 0x80
+        )
+        return table[(mask & -mask).bit_length() - 1]
+    
+    return determine_feedback
+
+
 class FitnessTrainer:
     """
     AI Fitness Trainer for squat analysis.
     Maintains state across frames for accurate rep counting.
     """
     
+    __slots__ = (
+        # Mode and derived thresholds
+        'mode', 'config', '_state_fn', '_feedback_fn',
+        '_visibility_cfg', '_frame_cfg',
+        # State machine
+        'current_state', 'prev_state', 'state_sequence', '_seen_states', '_seq_len',
+        # Counters and tracking
+        'correct_count', 'incorrect_count', 'depth_angles',
+        '_depth_src', '_depth_n', '_depth_mean', '_depth_m2',
+        'min_knee_angle_this_rep', '_feedback_counts',
+        # Timing
+        'start_ns', 'last_active_ns', '_last_frame_ns', 'active_ns',
+        # Readiness
+        'full_body_visible_count', 'is_ready', 'last_knee_vertical',
+        # Result returned by analyze, reused every frame
+        '_result_buf',
+    )
+    
     def __init__(self, mode: WorkoutMode = WorkoutMode.BEGINNER):
-        self.mode = mode
-        self.config = BEGINNER_CONFIG if mode == WorkoutMode.BEGINNER else PRO_CONFIG
+        self._set_mode(mode)
         
         # State machine
         self.current_state = SquatState.S1_NORMAL
         self.prev_state = SquatState.S1_NORMAL
-        self.state_sequence: List[str] = []
+        self._clear_sequence()
         
         # Counters
         self.correct_count = 0
@@ -113,13 +348,19 @@ class FitnessTrainer:
         
         # Tracking
         self.depth_angles: List[float] = []  # Knee angle at bottom of each rep
+        # Running count/mean/M2 of depth_angles (Welford) for the form score,
+        # and the list they were accumulated from
+        self._depth_src = self.depth_angles
+        self._depth_n, self._depth_mean, self._depth_m2 = 0, 0.0, 0.0
         self.min_knee_angle_this_rep = 180.0
-        self.feedback_history: Dict[str, int] = {}
+        self._feedback_counts: List[int] = list(_NO_FEEDBACK)
         
         # Timing
-        self.start_time = time.time()
-        self.last_active_time = time.time()
-        self.active_seconds = 0.0
+        # Monotonic nanosecond timestamps: immune to wall-clock jumps
+        self.start_ns = time.monotonic_ns()
+        self.last_active_ns = self.start_ns
+        self._last_frame_ns = self.start_ns
+        self.active_ns = 0
         
         # Readiness
         self.full_body_visible_count = 0
@@ -127,61 +368,67 @@ class FitnessTrainer:
         
         # Last frame data for inactivity detection
         self.last_knee_vertical = 0.0
+        
+        self._result_buf = AnalysisResultFast()
+    
+    def _set_mode(self, mode: WorkoutMode):
+        """Select the threshold config for a mode and derive its lookup tables."""
+        self.mode = mode
+        self.config = BEGINNER_CONFIG if mode == WorkoutMode.BEGINNER else PRO_CONFIG
+        
+        # State and feedback rules specialized for this config; the
+        # thresholds are fixed for the whole workout
+        cfg = self.config
+        self._state_fn = _make_state_fn(cfg)
+        self._feedback_fn = _make_feedback_fn(cfg)
+        
+        # Per-frame thresholds pre-unpacked into plain tuples so the hot path
+        # reads locals instead of chained config attribute lookups
+        self._visibility_cfg = (cfg.boundary_margin, cfg.visibility_thresh)
+        self._frame_cfg = (cfg.frames_required, cfg.offset_thresh,
+                           int(cfg.inactive_thresh * 1_000_000_000))
     
     def reset(self, mode: Optional[WorkoutMode] = None):
-        """Reset trainer state for new workout."""
-        if mode:
-            self.mode = mode
-            self.config = BEGINNER_CONFIG if mode == WorkoutMode.BEGINNER else PRO_CONFIG
+        """
+        Reset trainer state for new workout.
+        Works in place: the trainer's lists and result buffer are cleared and
+        kept, and mode tables are only rebuilt when the mode changes.
+        """
+        if mode and mode != self.mode:
+            self._set_mode(mode)
         
         self.current_state = SquatState.S1_NORMAL
         self.prev_state = SquatState.S1_NORMAL
-        self.state_sequence = []
+        self._clear_sequence()
         self.correct_count = 0
         self.incorrect_count = 0
-        self.depth_angles = []
+        self.depth_angles.clear()
+        self._depth_src = self.depth_angles
+        self._depth_n, self._depth_mean, self._depth_m2 = 0, 0.0, 0.0
         self.min_knee_angle_this_rep = 180.0
-        self.feedback_history = {}
-        self.start_time = time.time()
-        self.last_active_time = time.time()
-        self.active_seconds = 0.0
+        self._feedback_counts[:] = _NO_FEEDBACK
+        # Monotonic nanosecond timestamps: immune to wall-clock jumps
+        self.start_ns = time.monotonic_ns()
+        self.last_active_ns = self.start_ns
+        self._last_frame_ns = self.start_ns
+        self.active_ns = 0
         self.full_body_visible_count = 0
         self.is_ready = False
         self.last_knee_vertical = 0.0
     
-    def _is_full_body_visible(self, landmarks: List[dict]) -> Tuple[bool, str]:
+    def _is_full_body_visible(self, points: list, visibility: list) -> Tuple[bool, str]:
         """
         Check if key landmarks are visible and within frame.
+        points, visibility come from _key_landmarks().
         Returns (is_visible, debug_info).
         """
-        key_indices = [
-            (LandmarkIndex.LEFT_SHOULDER, "L.Shoulder"),
-            (LandmarkIndex.RIGHT_SHOULDER, "R.Shoulder"),
-            (LandmarkIndex.LEFT_HIP, "L.Hip"),
-            (LandmarkIndex.RIGHT_HIP, "R.Hip"),
-            (LandmarkIndex.LEFT_KNEE, "L.Knee"),
-            (LandmarkIndex.RIGHT_KNEE, "R.Knee"),
-            (LandmarkIndex.LEFT_ANKLE, "L.Ankle"),
-            (LandmarkIndex.RIGHT_ANKLE, "R.Ankle"),
-            (LandmarkIndex.NOSE, "Nose"),
-        ]
+        tol, vis_thresh = self._visibility_cfg
+        hi = 1.0 - tol
         
         missing = []
-        tol = self.config.boundary_margin
-        vis_thresh = self.config.visibility_thresh
-        
-        for idx, name in key_indices:
-            if idx >= len(landmarks):
-                missing.append(name)
-                continue
-            
-            lm = landmarks[idx]
-            x = lm.get('x', 0.0)
-            y = lm.get('y', 0.0)
-            vis = lm.get('visibility', 1.0)
-            
+        for (x, y), vis, name in zip(points, visibility, KEY_NAMES):
             # Check boundaries
-            if x < tol or x > (1.0 - tol) or y < tol or y > (1.0 - tol):
+            if x < tol or x > hi or y < tol or y > hi:
                 missing.append(f"{name}(edge)")
             elif vis < vis_thresh:
                 missing.append(f"{name}(vis)")
@@ -194,20 +441,7 @@ class FitnessTrainer:
         """
         Determine current state based on knee-vertical angle.
         """
-        cfg = self.config
-        
-        if knee_vertical_angle <= cfg.state_s1_max:
-            return SquatState.S1_NORMAL
-        elif cfg.state_s2_min <= knee_vertical_angle <= cfg.state_s2_max:
-            return SquatState.S2_TRANSITION
-        elif cfg.state_s3_min <= knee_vertical_angle <= cfg.state_s3_max:
-            return SquatState.S3_PASS
-        elif knee_vertical_angle > cfg.state_s3_max:
-            # Beyond s3 range - still count as s3 but may trigger deep squat warning
-            return SquatState.S3_PASS
-        else:
-            # In the gap between states - use previous state
-            return self.current_state
+        return self._state_fn(knee_vertical_angle, self.current_state)
     
     def _determine_feedback(self, 
                             hip_vertical: float,
@@ -218,60 +452,16 @@ class FitnessTrainer:
         Determine feedback based on angles.
         Returns (feedback_type, message, is_severe).
         """
-        cfg = self.config
-        
-        # Check severe issues first
-        
-        # Knee falling over toes (severe)
-        if ankle_vertical > cfg.knee_over_toes:
-            return (
-                FeedbackType.KNEE_OVER_TOES,
-                "Knee falling over toes! Push hips back.",
-                True
-            )
-        
-        # Deep squat (severe) - only in s3 state
-        if self.current_state == SquatState.S3_PASS and knee_vertical > cfg.deep_squat:
-            return (
-                FeedbackType.DEEP_SQUAT,
-                "Too deep! Don't go past parallel.",
-                True
-            )
-        
-        # Non-severe feedback
-        
-        # Bend forward (torso too upright)
-        if hip_vertical < cfg.hip_vertical_min:
-            return (
-                FeedbackType.BEND_FORWARD,
-                "Lean your torso forward slightly.",
-                False
-            )
-        
-        # Bend backwards (torso too forward)
-        if hip_vertical > cfg.hip_vertical_max:
-            return (
-                FeedbackType.BEND_BACKWARDS,
-                "Straighten your back, lean less forward.",
-                False
-            )
-        
-        # Lower hips (only during descent s1->s2)
-        if is_going_down and self.current_state == SquatState.S2_TRANSITION:
-            if cfg.lower_hips_min <= knee_vertical <= cfg.lower_hips_max:
-                return (
-                    FeedbackType.LOWER_HIPS,
-                    "Lower your hips more!",
-                    False
-                )
-        
-        # Good form - provide encouraging feedback based on state
-        if self.current_state == SquatState.S1_NORMAL:
-            return (FeedbackType.READY, "Ready - squat down!", False)
-        elif self.current_state == SquatState.S3_PASS:
-            return (FeedbackType.NONE, "Good depth! Now stand up.", False)
-        else:
-            return (FeedbackType.NONE, "", False)
+        return self._feedback_fn(self.current_state, hip_vertical, knee_vertical,
+                                 ankle_vertical, is_going_down)
+    
+    def _clear_sequence(self):
+        """Forget the s2/s3 states seen during the current rep."""
+        self._seen_states = 0
+        self._seq_len = 0
+        # Published copy for AnalysisResult; replaced (never mutated) on
+        # transitions so every frame can share it without copying
+        self.state_sequence: List[str] = []
     
     def _update_counters(self):
         """
@@ -279,47 +469,82 @@ class FitnessTrainer:
         Called when returning to s1.
         """
         # Valid sequence: [s2, s3, s2] - went down through s2, hit s3, came back up through s2
-        if len(self.state_sequence) >= 3:
+        if self._seq_len >= 3:
             # Check if sequence contains s2 -> s3 -> s2
-            has_s3 = SquatState.S3_PASS.value in self.state_sequence
+            has_s3 = self._seen_states & _SEEN_S3
             
             if has_s3:
                 self.correct_count += 1
                 # Record depth angle
                 if self.min_knee_angle_this_rep < 180:
-                    self.depth_angles.append(self.min_knee_angle_this_rep)
+                    self._record_depth(self.min_knee_angle_this_rep)
             else:
                 # Never reached full depth
                 self.incorrect_count += 1
-        elif len(self.state_sequence) > 0:
+        elif self._seq_len > 0:
             # Started but didn't complete
             self.incorrect_count += 1
         
         # Reset for next rep
-        self.state_sequence = []
+        self._clear_sequence()
         self.min_knee_angle_this_rep = 180.0
     
+    def _record_depth(self, angle: float):
+        """Store a rep's depth angle and update its running mean/M2."""
+        self._sync_depth_stats()
+        self.depth_angles.append(angle)
+        self._add_depth_stat(angle)
+    
+    def _add_depth_stat(self, angle: float):
+        """Welford update of the running depth count/mean/M2."""
+        self._depth_n += 1
+        delta = angle - self._depth_mean
+        self._depth_mean += delta / self._depth_n
+        self._depth_m2 += delta * (angle - self._depth_mean)
+    
+    def _sync_depth_stats(self):
+        """
+        Rebuild the running depth stats if depth_angles was replaced or
+        resized outside _record_depth, so the form score never goes stale.
+        """
+        angles = self.depth_angles
+        if angles is self._depth_src and len(angles) == self._depth_n:
+            return
+        self._depth_src = angles
+        self._depth_n, self._depth_mean, self._depth_m2 = 0, 0.0, 0.0
+        for angle in angles:
+            self._add_depth_stat(angle)
+    
     def _record_feedback(self, feedback_type: FeedbackType):
         """Record feedback occurrence for summary."""
         if feedback_type not in (FeedbackType.NONE, FeedbackType.READY):
-            key = feedback_type.value
-            self.feedback_history[key] = self.feedback_history.get(key, 0) + 1
+            self._feedback_counts[feedback_type] += 1
     
-    def analyze(self, landmarks: List[dict], 
+    def analyze(self, landmarks: Union[List[dict], np.ndarray], 
                 frame_width: int = 640, 
-                frame_height: int = 480) -> AnalysisResult:
+                frame_height: int = 480) -> AnalysisResultFast:
         """
         Analyze a single frame of pose landmarks.
         
         Args:
-            landmarks: List of 33 landmark dicts with x, y, z, visibility
+            landmarks: List of 33 landmark dicts with x, y, z, visibility,
+                or a (33, 4) array of the same columns
             frame_width: Frame width in pixels
             frame_height: Frame height in pixels
         
         Returns:
-            AnalysisResult with all analysis data
+            AnalysisResultFast with all analysis data. The same instance is
+            reused by every call, so it is only valid until the next analyze;
+            copy it out (to_dict) if it must outlive the frame.
         """
-        result = AnalysisResult()
+        result = self._result_buf
+        result.reset()
+        
+        # One clock read per frame; dt is capped so a stalled stream
+        # doesn't count as active time
+        now_ns = time.monotonic_ns()
+        dt_ns = min(now_ns - self._last_frame_ns, _MAX_FRAME_DT_NS)
+        self._last_frame_ns = now_ns
         
         # Check basic requirements
         if len(landmarks) < 33:
@@ -327,7 +552,85 @@ class FitnessTrainer:
             return result
         
         # Check full body visibility
-        is_visible, debug_msg = self._is_full_body_visible(landmarks)
+        points, visibility = _key_landmarks(landmarks)
+        is_visible, debug_msg = self._is_full_body_visible(points, visibility)
+        if not self._update_readiness(result, now_ns, is_visible, debug_msg):
+            return result
+        
+        # All angles for both sides from the same key points
+        return self._analyze_ready_frame(result, now_ns, dt_ns, _compute_all_angles(points))
+    
+    def analyze_batch(self, landmarks_batch: np.ndarray,
+                      timestamps_ms: Optional[np.ndarray] = None) -> List[AnalysisResultFast]:
+        """
+        Analyze N buffered frames in order, e.g. for replay or bulk analysis.
+        
+        Visibility and angles are computed for the whole batch in one NumPy
+        pass, which only pays off over many frames (analyze walks a single
+        frame in Python instead); only the state machine runs frame by frame.
+        
+        Args:
+            landmarks_batch: (N, 33, 4) array of x, y, z, visibility
+            timestamps_ms: Optional (N,) frame timestamps. Frames are placed so
+                the last one is "now"; without timestamps all share one time.
+        
+        Returns:
+            One AnalysisResultFast per frame, same as calling analyze on each
+        """
+        batch = np.asarray(landmarks_batch, dtype=np.float64)
+        if batch.ndim != 3 or batch.shape[1] < 33 or batch.shape[2] < 4:
+            raise ValueError(f"Expected landmarks of shape (N, 33, 4), got {batch.shape}")
+        n_frames = batch.shape[0]
+        xs = batch[:, :, 0]
+        ys = batch[:, :, 1]
+        vis = batch[:, :, 3]
+        
+        now_ns = time.monotonic_ns()
+        if timestamps_ms is None:
+            frame_ns = [now_ns] * n_frames
+        else:
+            ts = np.asarray(timestamps_ms, dtype=np.int64)
+            frame_ns = (now_ns - (ts[-1] - ts) * 1_000_000).tolist()
+        
+        # Visibility for every frame; messages only for the failing ones
+        tol, vis_thresh = self._visibility_cfg
+        xk = xs[:, KEY_INDICES]
+        yk = ys[:, KEY_INDICES]
+        bad = ((xk < tol) | (xk > (1.0 - tol)) | (yk < tol) | (yk > (1.0 - tol))
+               | (vis[:, KEY_INDICES] < vis_thresh)).any(axis=1).tolist()
+        
+        angles = _compute_all_angles_batch(xs, ys).tolist()
+        
+        results = []
+        for i in range(n_frames):
+            result = AnalysisResultFast()
+            results.append(result)
+            
+            t_ns = frame_ns[i]
+            dt_ns = min(max(t_ns - self._last_frame_ns, 0), _MAX_FRAME_DT_NS)
+            self._last_frame_ns = t_ns
+            
+            if bad[i]:
+                is_visible, debug_msg = self._is_full_body_visible(*_key_landmarks(batch[i]))
+            else:
+                is_visible, debug_msg = True, "Full body visible"
+            if not self._update_readiness(result, t_ns, is_visible, debug_msg):
+                continue
+            
+            a = angles[i]
+            self._analyze_ready_frame(
+                result, t_ns, dt_ns,
+                (a[0], a[1], a[2], (a[3], a[4], a[5]), (a[6], a[7], a[8]))
+            )
+        
+        return results
+    
+    def _update_readiness(self, result: AnalysisResultFast, now_ns: int,
+                          is_visible: bool, debug_msg: str) -> bool:
+        """
+        Apply a frame's visibility check. Returns whether the trainer is ready;
+        if not, result is filled in and the frame needs no further analysis.
+        """
         result.debug_info = debug_msg
         result.is_full_body_visible = is_visible
         
@@ -337,27 +640,31 @@ class FitnessTrainer:
             self.full_body_visible_count = 0
             self.is_ready = False
         
-        result.is_ready = self.full_body_visible_count >= self.config.frames_required
+        result.is_ready = self.full_body_visible_count >= self._frame_cfg[0]
         
-        # Extract landmarks (using normalized coordinates)
-        def get_pt(idx):
-            return get_landmark_coords(landmarks, idx, 1.0, 1.0)
+        # Not ready: skip all angle math. The inactivity clock is held so
+        # time spent getting into position doesn't reset the counters.
+        if not result.is_ready:
+            self.last_active_ns = now_ns
+            result.feedback_type = FeedbackType.NONE
+            result.feedback_message = "Position full body in frame"
+            result.current_state = self.current_state
+            result.state_sequence = self.state_sequence
+            result.correct_count = self.correct_count
+            result.incorrect_count = self.incorrect_count
         
-        nose = get_pt(LandmarkIndex.NOSE)
-        l_shoulder = get_pt(LandmarkIndex.LEFT_SHOULDER)
-        r_shoulder = get_pt(LandmarkIndex.RIGHT_SHOULDER)
-        l_hip = get_pt(LandmarkIndex.LEFT_HIP)
-        r_hip = get_pt(LandmarkIndex.RIGHT_HIP)
-        l_knee = get_pt(LandmarkIndex.LEFT_KNEE)
-        r_knee = get_pt(LandmarkIndex.RIGHT_KNEE)
-        l_ankle = get_pt(LandmarkIndex.LEFT_ANKLE)
-        r_ankle = get_pt(LandmarkIndex.RIGHT_ANKLE)
-        l_foot = get_pt(LandmarkIndex.LEFT_FOOT)
-        r_foot = get_pt(LandmarkIndex.RIGHT_FOOT)
+        return result.is_ready
+    
+    def _analyze_ready_frame(self, result: AnalysisResultFast, now_ns: int,
+                             dt_ns: int, angles: tuple) -> AnalysisResultFast:
+        """Run view detection, inactivity and the state machine for a ready frame."""
+        _, offset_thresh, inactive_ns = self._frame_cfg
+        (offset, left_knee_angle, right_knee_angle,
+         left_verticals, right_verticals) = angles
         
         # Calculate offset angle (frontal view detection)
-        result.offset_angle = offset_angle(nose, l_shoulder, r_shoulder)
-        result.is_frontal_view = result.offset_angle > self.config.offset_thresh
+        result.offset_angle = offset
+        result.is_frontal_view = result.offset_angle > offset_thresh
         
         if result.is_frontal_view:
             result.feedback_type = FeedbackType.FRONTAL_WARNING
@@ -368,26 +675,18 @@ class FitnessTrainer:
             return result
         
         # Determine which side is more visible (use side with smaller knee angle)
-        left_knee_angle = angle_at_point(l_hip, l_knee, l_ankle)
-        right_knee_angle = angle_at_point(r_hip, r_knee, r_ankle)
-        
         if left_knee_angle < right_knee_angle:
             side = "left"
-            shoulder, hip, knee, ankle, foot = l_shoulder, l_hip, l_knee, l_ankle, l_foot
             knee_angle = left_knee_angle
+            hip_vertical, knee_vertical, ankle_vertical = left_verticals
         else:
             side = "right"
-            shoulder, hip, knee, ankle, foot = r_shoulder, r_hip, r_knee, r_ankle, r_foot
             knee_angle = right_knee_angle
+            hip_vertical, knee_vertical, ankle_vertical = right_verticals
         
         result.detected_side = side
         result.knee_angle = knee_angle
         
-        # Calculate angles with vertical
-        hip_vertical = angle_with_vertical(shoulder, hip)
-        knee_vertical = angle_with_vertical(hip, knee)
-        ankle_vertical = angle_with_vertical(knee, ankle)
-        
         result.hip_vertical_angle = hip_vertical
         result.knee_vertical_angle = knee_vertical
         result.ankle_vertical_angle = ankle_vertical
@@ -396,68 +695,69 @@ class FitnessTrainer:
         if knee_angle < self.min_knee_angle_this_rep:
             self.min_knee_angle_this_rep = knee_angle
         
+        # Not-ready frames skip the angles, so the previous knee angle is
+        # stale on the first ready frame; start movement tracking from here
+        if not self.is_ready:
+            self.last_knee_vertical = knee_vertical
+        
         # Check inactivity
-        current_time = time.time()
         angle_change = abs(knee_vertical - self.last_knee_vertical)
         
         if angle_change > 3.0:  # Movement threshold
-            self.last_active_time = current_time
-            self.active_seconds += 0.033  # Approximate frame time
+            self.last_active_ns = now_ns
+            self.active_ns += dt_ns
         
-        inactivity = current_time - self.last_active_time
-        result.inactivity_seconds = inactivity
+        inactive_for_ns = now_ns - self.last_active_ns
+        result.inactivity_seconds = inactive_for_ns / 1e9
         
-        if inactivity > self.config.inactive_thresh:
+        if inactive_for_ns > inactive_ns:
             # Reset counters due to inactivity
             self.correct_count = 0
             self.incorrect_count = 0
-            self.state_sequence = []
-            self.last_active_time = current_time
+            self._clear_sequence()
+            self.last_active_ns = now_ns
         
         self.last_knee_vertical = knee_vertical
         
-        # State machine - only process if ready
-        if result.is_ready:
-            self.is_ready = True
-            
-            # Determine new state
-            new_state = self._determine_state(knee_vertical)
-            
-            # Check direction
-            is_going_down = knee_vertical > self.last_knee_vertical
-            
-            # State transition logic
-            if new_state != self.current_state:
-                self.prev_state = self.current_state
-                self.current_state = new_state
-                
-                # Track state sequence (only s2 and s3)
-                if new_state in (SquatState.S2_TRANSITION, SquatState.S3_PASS):
-                    if len(self.state_sequence) < 3:
-                        self.state_sequence.append(new_state.value)
-                
-                # Check if we've returned to s1 (standing)
-                if new_state == SquatState.S1_NORMAL:
-                    self._update_counters()
-            
-            # Determine feedback
-            feedback_type, feedback_msg, is_severe = self._determine_feedback(
-                hip_vertical, knee_vertical, ankle_vertical, is_going_down
-            )
+        # State machine
+        self.is_ready = True
+        
+        # Determine new state
+        new_state = self._state_fn(knee_vertical, self.current_state)
+        
+        # Check direction
+        is_going_down = knee_vertical > self.last_knee_vertical
+        
+        # State transition logic
+        if new_state != self.current_state:
+            self.prev_state = self.current_state
+            self.current_state = new_state
             
-            result.feedback_type = feedback_type
-            result.feedback_message = feedback_msg
-            result.is_severe_feedback = is_severe
+            # Track state sequence (only s2 and s3)
+            if new_state in (SquatState.S2_TRANSITION, SquatState.S3_PASS):
+                if self._seq_len < 3:
+                    self._seq_len += 1
+                    self._seen_states |= _SEEN_S3 if new_state == SquatState.S3_PASS else _SEEN_S2
+                    self.state_sequence = self.state_sequence + [new_state.value_str]
             
-            self._record_feedback(feedback_type)
-        else:
-            # Not ready
-            result.feedback_type = FeedbackType.NONE
-            result.feedback_message = "Position full body in frame"
+            # Check if we've returned to s1 (standing)
+            if new_state == SquatState.S1_NORMAL:
+                self._update_counters()
+        
+        # Determine feedback
+        feedback_type, feedback_msg, is_severe = self._feedback_fn(
+            self.current_state, hip_vertical, knee_vertical, ankle_vertical, is_going_down
+        )
+        
+        result.feedback_type = feedback_type
+        result.feedback_message = feedback_msg
+        result.is_severe_feedback = is_severe
+        
+        self._record_feedback(feedback_type)
         
         # Update result with current state
         result.current_state = self.current_state
-        result.state_sequence = self.state_sequence.copy()
+        result.state_sequence = self.state_sequence
         result.correct_count = self.correct_count
         result.incorrect_count = self.incorrect_count
         
@@ -492,13 +792,17 @@ class FitnessTrainer:
         else:
             form_label = "Needs Work"
         
-        # Most common issue
+        # Feedback breakdown and most common issue
+        feedback_counts = {
+            ft.value_str: count
+            for ft, count in zip(_FEEDBACK_TYPES, self._feedback_counts) if count
+        }
         most_common = None
-        if self.feedback_history:
-            most_common = max(self.feedback_history, key=self.feedback_history.get)
+        if feedback_counts:
+            most_common = max(feedback_counts, key=feedback_counts.get)
         
         # Duration
-        total_duration = int(time.time() - self.start_time)
+        total_duration = (time.monotonic_ns() - self.start_ns) // 1_000_000_000
         
         return WorkoutSummary(
             total_reps=total_reps,
@@ -510,10 +814,10 @@ class FitnessTrainer:
             depth_angles=self.depth_angles.copy(),
             form_score=form_score,
             form_label=form_label,
-            feedback_counts=self.feedback_history.copy(),
+            feedback_counts=feedback_counts,
             most_common_issue=most_common,
             total_duration_seconds=total_duration,
-            active_time_seconds=int(self.active_seconds),
+            active_time_seconds=self.active_ns // 1_000_000_000,
             mode=self.mode
         )
     
@@ -527,20 +831,20 @@ class FitnessTrainer:
         accuracy_score = (self.correct_count / total) * 50
         
         # Depth consistency component (25% of score)
+        self._sync_depth_stats()
         consistency_score = 0.0
-        if len(self.depth_angles) > 1:
-            import numpy as np
-            std_dev = np.std(self.depth_angles)
+        if self._depth_n > 1:
+            # Population std (same as np.std) from the running M2
+            std_dev = math.sqrt(self._depth_m2 / self._depth_n)
             # Lower std_dev = more consistent = higher score
             consistency_score = max(0, 25 - std_dev)
-        elif len(self.depth_angles) == 1:
+        elif self._depth_n == 1:
             consistency_score = 25.0
         
         # Severe feedback penalty (25% of score)
         severe_penalty = 0.0
-        severe_types = [FeedbackType.KNEE_OVER_TOES.value, FeedbackType.DEEP_SQUAT.value]
-        for ft in severe_types:
-            count = self.feedback_history.get(ft, 0)
+        for ft in (FeedbackType.KNEE_OVER_TOES, FeedbackType.DEEP_SQUAT):
+            count = self._feedback_counts[ft]
             severe_penalty += count * 2  # 2 points per severe issue
         
         feedback_score = max(0, 25 - severe_penalty)
@@ -1,9 +1,10 @@
 """
 Pydantic models for request/response data structures.
 """
-from pydantic import BaseModel, Field
-from typing import List, Optional
-from enum import Enum
+from dataclasses import dataclass, field, asdict
+from pydantic import BaseModel, Field, field_serializer, field_validator
+from typing import List, Literal, Optional
+from enum import Enum, IntEnum
 
 
 class WorkoutMode(str, Enum):
@@ -11,21 +12,59 @@ class WorkoutMode(str, Enum):
     PRO = "pro"
 
 
-class SquatState(str, Enum):
-    S1_NORMAL = "s1"      # Standing - knee-vertical angle ≤ 32°
-    S2_TRANSITION = "s2"  # Going down/up - 35°-65°
-    S3_PASS = "s3"        # Full squat depth - 75°-95°
-
-
-class FeedbackType(str, Enum):
-    NONE = "none"
-    READY = "ready"
-    BEND_FORWARD = "bend_forward"       # Torso too upright, lean forward
-    BEND_BACKWARDS = "bend_backwards"   # Torso leaning too far forward
-    LOWER_HIPS = "lower_hips"           # Not going deep enough
-    KNEE_OVER_TOES = "knee_over_toes"   # Knee tracking issue (severe)
-    DEEP_SQUAT = "deep_squat"           # Going too deep (severe)
-    FRONTAL_WARNING = "frontal_warning" # Turn to side view
+class SquatState(IntEnum):
+    S1_NORMAL = 1      # Standing - knee-vertical angle ≤ 32°
+    S2_TRANSITION = 2  # Going down/up - 35°-65°
+    S3_PASS = 3        # Full squat depth - 75°-95°
+    
+    @property
+    def value_str(self) -> str:
+        """Wire name sent to clients ("s1", "s2", "s3")."""
+        return _SQUAT_WIRE[self]
+
+
+class FeedbackType(IntEnum):
+    NONE = 0
+    READY = 1
+    BEND_FORWARD = 2      # Torso too upright, lean forward
+    BEND_BACKWARDS = 3    # Torso leaning too far forward
+    LOWER_HIPS = 4        # Not going deep enough
+    KNEE_OVER_TOES = 5    # Knee tracking issue (severe)
+    DEEP_SQUAT = 6        # Going too deep (severe)
+    FRONTAL_WARNING = 7   # Turn to side view
+    
+    @property
+    def value_str(self) -> str:
+        """Wire name sent to clients ("none", "bend_forward", ...)."""
+        return _FEEDBACK_WIRE[self]
+
+
+# Wire names, built once and looked up directly by the serializers
+_SQUAT_WIRE = {
+    SquatState.S1_NORMAL: "s1",
+    SquatState.S2_TRANSITION: "s2",
+    SquatState.S3_PASS: "s3",
+}
+_FEEDBACK_WIRE = {
+    FeedbackType.NONE: "none",
+    FeedbackType.READY: "ready",
+    FeedbackType.BEND_FORWARD: "bend_forward",
+    FeedbackType.BEND_BACKWARDS: "bend_backwards",
+    FeedbackType.LOWER_HIPS: "lower_hips",
+    FeedbackType.KNEE_OVER_TOES: "knee_over_toes",
+    FeedbackType.DEEP_SQUAT: "deep_squat",
+    FeedbackType.FRONTAL_WARNING: "frontal_warning",
+}
+# Inverse lookups so AnalysisResult can read back its own JSON
+_SQUAT_FROM_WIRE = {name: state for state, name in _SQUAT_WIRE.items()}
+_FEEDBACK_FROM_WIRE = {name: ft for ft, name in _FEEDBACK_WIRE.items()}
+
+# Wire names as types, so the OpenAPI schema still lists the enum values
+SquatStateWire = Literal["s1", "s2", "s3"]
+FeedbackTypeWire = Literal[
+    "none", "ready", "bend_forward", "bend_backwards",
+    "lower_hips", "knee_over_toes", "deep_squat", "frontal_warning",
+]
 
 
 class PoseLandmark(BaseModel):
@@ -80,6 +119,86 @@ class AnalysisResult(BaseModel):
     
     # Debug
     debug_info: str = ""
+    
+    @field_validator("current_state", mode="before")
+    @classmethod
+    def _parse_state(cls, value):
+        return _SQUAT_FROM_WIRE.get(value, value) if isinstance(value, str) else value
+    
+    @field_validator("feedback_type", mode="before")
+    @classmethod
+    def _parse_feedback(cls, value):
+        return _FEEDBACK_FROM_WIRE.get(value, value) if isinstance(value, str) else value
+    
+    @field_serializer("current_state")
+    def _serialize_state(self, value: SquatState) -> SquatStateWire:
+        return _SQUAT_WIRE[value]
+    
+    @field_serializer("feedback_type")
+    def _serialize_feedback(self, value: FeedbackType) -> FeedbackTypeWire:
+        return _FEEDBACK_WIRE[value]
+
+
+@dataclass(slots=True)
+class AnalysisResultFast:
+    """
+    Per-frame analysis result without Pydantic validation.
+    Same fields and defaults as AnalysisResult; FitnessTrainer.analyze returns
+    this and the API endpoints send to_dict() encoded with orjson.
+    """
+    # State machine
+    current_state: SquatState = SquatState.S1_NORMAL
+    state_sequence: List[str] = field(default_factory=list)
+    
+    # Counters
+    correct_count: int = 0
+    incorrect_count: int = 0
+    
+    # Angles (in degrees)
+    knee_angle: float = 180.0
+    hip_vertical_angle: float = 0.0
+    knee_vertical_angle: float = 0.0
+    ankle_vertical_angle: float = 0.0
+    
+    # Feedback
+    feedback_type: FeedbackType = FeedbackType.NONE
+    feedback_message: str = ""
+    is_severe_feedback: bool = False
+    
+    # View detection
+    detected_side: str = "right"
+    offset_angle: float = 0.0
+    is_frontal_view: bool = False
+    
+    # Readiness
+    is_full_body_visible: bool = False
+    is_ready: bool = False
+    
+    # Timing
+    inactivity_seconds: float = 0.0
+    
+    # Debug
+    debug_info: str = ""
+    
+    def reset(self):
+        """Restore every field to its default so the instance can be reused."""
+        # The generated __init__ assigns exactly the declared defaults
+        self.__init__()
+    
+    def to_dict(self) -> dict:
+        """
+        Plain dict of all fields (what AnalysisResult.model_dump() returns).
+        Built shallowly: state_sequence is shared, which is safe because the
+        trainer replaces that list rather than mutating it.
+        """
+        d = {name: getattr(self, name) for name in self.__slots__}
+        d["current_state"] = _SQUAT_WIRE[self.current_state]
+        d["feedback_type"] = _FEEDBACK_WIRE[self.feedback_type]
+        return d
+    
+    def to_model(self) -> AnalysisResult:
+        """Validated Pydantic AnalysisResult, for callers that want the model."""
+        return AnalysisResult.model_validate(asdict(self))
 
 
 class WorkoutSummary(BaseModel):
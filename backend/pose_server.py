@@ -2,12 +2,14 @@
 FastAPI WebSocket server for real-time pose analysis.
 Receives pose landmarks from Android app and returns analysis results.
 """
-import json
+import asyncio
 import logging
-from typing import Dict
+from operator import itemgetter
+from typing import Union
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+import orjson
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from models import (
@@ -16,28 +18,84 @@ from models import (
     WorkoutSummary, 
     ResetRequest, 
     HealthResponse,
-    WorkoutMode
+    WorkoutMode,
 )
 from fitness_trainer import FitnessTrainer
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
 
-# Store active trainers per connection
-trainers: Dict[str, FitnessTrainer] = {}
-
 # Default trainer for REST endpoints
 default_trainer = FitnessTrainer()
 
 
+async def send_json_fast(websocket: WebSocket, data) -> None:
+    """send_json replacement that encodes with orjson (still a text frame)."""
+    await websocket.send_text(orjson.dumps(data).decode())
+
+
+async def receive_raw(websocket: WebSocket) -> Union[bytes, str]:
+    """
+    Receive one message as sent: binary frames stay bytes (no UTF-8 decode),
+    text frames are passed through. Both are accepted by orjson.loads.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    data = message.get("bytes")
+    return data if data is not None else message.get("text", "")
+
+
+# Smallest message that can hold 33 landmarks (each needs x and y);
+# anything shorter that isn't a command is rejected without parsing
+MIN_FRAME_BYTES = len(orjson.dumps({"landmarks": [{"x": 0, "y": 0}] * 33}))
+
+# Messages above this size are decoded in a worker thread so a bloated
+# payload can't hold up other connections; a plain 33-landmark frame is 2-4 KB
+LARGE_FRAME_BYTES = 8192
+
+# Static error replies, encoded once
+_ERR_INVALID_LANDMARKS = orjson.dumps({"error": "Invalid landmarks data"}).decode()
+_ERR_INVALID_JSON = orjson.dumps({"error": "Invalid JSON format"}).decode()
+
+
+def is_short_frame(data: Union[bytes, str]) -> bool:
+    """True for a message too small to be a pose frame that isn't a command."""
+    if len(data) >= MIN_FRAME_BYTES:
+        return False
+    return (b"command" if isinstance(data, bytes) else "command") not in data
+
+
+# WebSocket "mode" strings; unknown values fall back to beginner
+_MODES = {mode.value: mode for mode in WorkoutMode}
+
+# Fields of a complete pose frame, fetched in one call
+_FRAME_FIELDS = itemgetter("mode", "landmarks", "frame_width", "frame_height")
+
+
+def decode_message(data: Union[bytes, str]) -> tuple:
+    """
+    Parse a WebSocket message.
+    Returns (command, mode, landmarks, frame_width, frame_height).
+    """
+    msg = orjson.loads(data)
+    # Fast path: a full pose frame needs no per-field defaults
+    if "command" not in msg:
+        try:
+            return (None, *_FRAME_FIELDS(msg))
+        except KeyError:
+            pass
+    return (msg.get("command"), msg.get("mode", "beginner"), msg.get("landmarks", []),
+            msg.get("frame_width", 640), msg.get("frame_height", 480))
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     logger.info("🏋️ Formly Pose Analysis Server starting...")
     yield
     logger.info("Server shutting down...")
-    trainers.clear()
 
 
 app = FastAPI(
@@ -57,10 +115,15 @@ app.add_middleware(
 )
 
 
+# Health payload never changes; encoded once. The Response itself is built
+# per request because FastAPI mutates the returned object (e.g. .background)
+_HEALTH_BODY = HealthResponse(status="healthy", version="1.0.0").model_dump_json().encode()
+
+
 @app.get("/api/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
-    return HealthResponse(status="healthy", version="1.0.0")
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 @app.post("/api/reset")
@@ -68,14 +131,15 @@ async def reset_workout(request: ResetRequest = None):
     """Reset workout state for a new session."""
     mode = request.mode if request else WorkoutMode.BEGINNER
     default_trainer.reset(mode)
-    logger.info(f"Workout reset with mode: {mode}")
+    logger.info("Workout reset with mode: %s", mode)
     return {"status": "reset", "mode": mode}
 
 
 @app.get("/api/summary", response_model=WorkoutSummary)
 async def get_summary():
     """Get workout summary (for pause screen)."""
-    return default_trainer.get_summary()
+    return Response(content=default_trainer.get_summary().model_dump_json(),
+                    media_type="application/json")
 
 
 @app.post("/api/analyze", response_model=AnalysisResult)
@@ -97,7 +161,8 @@ async def analyze_pose(pose_data: PoseData):
         pose_data.frame_height
     )
     
-    return result
+    # Same encoding as the WebSocket path; response_model documents the shape
+    return Response(content=orjson.dumps(result.to_dict()), media_type="application/json")
 
 
 @app.websocket("/ws/analyze")
@@ -114,76 +179,93 @@ async def websocket_analyze(websocket: WebSocket):
         "frame_height": 480
     }
     
-    Response format: AnalysisResult as JSON
+    Response format: AnalysisResult as JSON. A result identical to the
+    previous one (e.g. while waiting for the full body) is not re-sent.
     """
     await websocket.accept()
     
-    # Create trainer for this connection
-    connection_id = str(id(websocket))
-    trainer = FitnessTrainer()
-    trainers[connection_id] = trainer
+    # Create trainer for this connection; it lives as long as the socket
+    trainer = websocket.state.trainer = FitnessTrainer()
+    # Raw mode string of the last frame; the mode is only re-resolved when it changes
+    last_mode_str = None
+    # Last analysis result or error sent, as encoded JSON; every other reply
+    # clears it so the next result always goes out after it
+    prev_payload = None
     
-    logger.info(f"New WebSocket connection: {connection_id}")
+    logger.info("New WebSocket connection: %s", websocket.client)
     
     try:
         while True:
-            # Receive pose data
-            data = await websocket.receive_text()
+            # Receive pose data (binary or text frame)
+            data = await receive_raw(websocket)
+            
+            # Truncated/partial frames are rejected before the JSON decode
+            if is_short_frame(data):
+                await websocket.send_text(_ERR_INVALID_LANDMARKS)
+                prev_payload = None
+                continue
             
             try:
-                pose_dict = json.loads(data)
-                
-                # Handle special commands
-                if pose_dict.get("command") == "reset":
-                    mode_str = pose_dict.get("mode", "beginner")
-                    mode = WorkoutMode.BEGINNER if mode_str == "beginner" else WorkoutMode.PRO
-                    trainer.reset(mode)
-                    await websocket.send_json({"status": "reset", "mode": mode_str})
-                    continue
+                if len(data) > LARGE_FRAME_BYTES:
+                    decoded = await asyncio.to_thread(decode_message, data)
+                else:
+                    decoded = decode_message(data)
+                command, mode_str, landmarks, frame_width, frame_height = decoded
                 
-                if pose_dict.get("command") == "summary":
-                    summary = trainer.get_summary()
-                    await websocket.send_json(summary.model_dump())
-                    continue
+                # Handle special commands (pose frames carry none)
+                if command is not None:
+                    if command == "reset":
+                        trainer.reset(_MODES.get(mode_str, WorkoutMode.BEGINNER))
+                        last_mode_str = None
+                        await send_json_fast(websocket, {"status": "reset", "mode": mode_str})
+                        prev_payload = None
+                        continue
+                    
+                    if command == "summary":
+                        summary = trainer.get_summary()
+                        await websocket.send_text(summary.model_dump_json())
+                        prev_payload = None
+                        continue
                 
-                # Parse pose data
-                landmarks = pose_dict.get("landmarks", [])
-                
-                if not landmarks or len(landmarks) < 33:
-                    await websocket.send_json({
+                # Validate pose data
+                if len(landmarks) < 33:
+                    await send_json_fast(websocket, {
                         "error": "Invalid landmarks data",
                         "received_count": len(landmarks)
                     })
+                    prev_payload = None
                     continue
                 
                 # Check if mode changed
-                mode_str = pose_dict.get("mode", "beginner")
-                new_mode = WorkoutMode.BEGINNER if mode_str == "beginner" else WorkoutMode.PRO
-                if new_mode != trainer.mode:
-                    trainer.reset(new_mode)
+                if mode_str != last_mode_str:
+                    new_mode = _MODES.get(mode_str, WorkoutMode.BEGINNER)
+                    if new_mode != trainer.mode:
+                        trainer.reset(new_mode)
+                    last_mode_str = mode_str
                 
                 # Analyze pose
-                frame_width = pose_dict.get("frame_width", 640)
-                frame_height = pose_dict.get("frame_height", 480)
-                
                 result = trainer.analyze(landmarks, frame_width, frame_height)
                 
-                # Send result
-                await websocket.send_json(result.model_dump())
+                # Send result, skipping exact repeats of the previous one
+                payload = orjson.dumps(result.to_dict())
+                if payload != prev_payload:
+                    await websocket.send_text(payload.decode())
+                    prev_payload = payload
                 
-            except json.JSONDecodeError as e:
-                logger.warning(f"Invalid JSON received: {e}")
-                await websocket.send_json({"error": "Invalid JSON format"})
+            except orjson.JSONDecodeError as e:
+                logger.warning("Invalid JSON received: %s", e)
+                await websocket.send_text(_ERR_INVALID_JSON)
+                prev_payload = None
             except Exception as e:
-                logger.error(f"Analysis error: {e}")
-                await websocket.send_json({"error": str(e)})
+                # A failure that repeats every frame is logged and sent once
+                payload = orjson.dumps({"error": str(e)})
+                if payload != prev_payload:
+                    logger.error("Analysis error: %s", e)
+                    await websocket.send_text(payload.decode())
+                    prev_payload = payload
     
     except WebSocketDisconnect:
-        logger.info(f"WebSocket disconnected: {connection_id}")
-    finally:
-        # Cleanup
-        if connection_id in trainers:
-            del trainers[connection_id]
+        logger.info("WebSocket disconnected: %s", websocket.client)
 
 
 @app.websocket("/ws/test")
@@ -201,11 +283,19 @@ async def websocket_test(websocket: WebSocket):
 
 
 if __name__ == "__main__":
+    import os
     import uvicorn
+    
+    # Trainer state is per process, so extra workers are opt-in
+    # (clients must stay on one worker for a whole session).
+    # For development with auto-reload: uvicorn pose_server:app --reload
     uvicorn.run(
         "pose_server:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level="info"
+        loop="auto",        # uvloop when installed (not available on Windows)
+        http="httptools",
+        ws="websockets",
+        workers=int(os.environ.get("POSE_SERVER_WORKERS", "1")),
+        log_level="warning"
     )
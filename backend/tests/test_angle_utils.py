@@ -3,7 +3,11 @@ Tests for angle utility functions.
 """
 import pytest
 import math
-from angle_utils import angle_at_point, angle_with_vertical, offset_angle
+import numpy as np
+from angle_utils import (
+    angle_at_point, angle_with_vertical, offset_angle,
+    angle_at_point_batch, angle_with_vertical_batch,
+)
 
 
 class TestAngleAtPoint:
@@ -41,6 +45,18 @@ class TestAngleAtPoint:
         c = (2, 2)
         angle = angle_at_point(a, b, c)
         assert angle == 0.0
+    
+    def test_orientation_independent(self):
+        """Clockwise and counter-clockwise point orders give the same angle."""
+        a = (0, 1)
+        b = (0, 0)  # Vertex
+        c = (-1, -1)
+        assert abs(angle_at_point(a, b, c) - 135.0) < 1e-9
+        assert abs(angle_at_point(c, b, a) - 135.0) < 1e-9
+    
+    def test_returns_python_float(self):
+        """Result is a plain float, not a boxed NumPy scalar."""
+        assert type(angle_at_point((0, 0), (1, 0), (1, 1))) is float
 
 
 class TestAngleWithVertical:
@@ -66,6 +82,10 @@ class TestAngleWithVertical:
         p2 = (1.0, 1.0)
         angle = angle_with_vertical(p1, p2)
         assert abs(angle - 45.0) < 1.0
+    
+    def test_returns_python_float(self):
+        """Result is a plain float, not a boxed NumPy scalar."""
+        assert type(angle_with_vertical((0, 0), (1, 1))) is float
 
 
 class TestOffsetAngle:
@@ -92,5 +112,29 @@ class TestOffsetAngle:
         assert angle > 0
 
 
+class TestBatchAngles:
+    """Batch variants must match the scalar functions element-wise."""
+    
+    def test_batch_angle_at_point(self):
+        rng = np.random.default_rng(0)
+        a, b, c = rng.random((3, 50, 2))
+        a[0] = b[0]  # zero-length vector
+        
+        angles = angle_at_point_batch(a, b, c)
+        
+        expected = [angle_at_point(tuple(p), tuple(q), tuple(r)) for p, q, r in zip(a, b, c)]
+        assert angles.shape == (50,)
+        assert angles == pytest.approx(expected)
+    
+    def test_batch_angle_with_vertical(self):
+        rng = np.random.default_rng(1)
+        p1, p2 = rng.random((2, 50, 2))
+        
+        angles = angle_with_vertical_batch(p1, p2)
+        
+        expected = [angle_with_vertical(tuple(p), tuple(q)) for p, q in zip(p1, p2)]
+        assert angles == pytest.approx(expected)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
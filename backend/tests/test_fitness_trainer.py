@@ -1,59 +1,54 @@
 """
 Tests for FitnessTrainer class.
 """
+import math
 import pytest
-from fitness_trainer import FitnessTrainer, BEGINNER_CONFIG, PRO_CONFIG
-from models import SquatState, FeedbackType, WorkoutMode
+import numpy as np
+from angle_utils import angle_at_point, angle_with_vertical, offset_angle
+from fitness_trainer import (
+    FitnessTrainer, BEGINNER_CONFIG, PRO_CONFIG, KEY_INDICES,
+    _compute_all_angles, _compute_all_angles_batch,
+)
+from models import AnalysisResult, AnalysisResultFast, SquatState, FeedbackType, WorkoutMode
 
 
-def create_mock_landmarks(knee_vertical_angle: float = 0.0, 
-                          hip_vertical_angle: float = 30.0,
-                          ankle_vertical_angle: float = 10.0):
+LANDMARK_FIELDS = ("x", "y", "z", "visibility")
+
+# Key landmark rows of the mock pose: index -> (x, y); knees get the offset
+_MOCK_IDX = np.array([11, 12, 23, 24, 25, 26, 27, 28, 31, 32, 0])
+_MOCK_XY = np.array([
+    [0.4, 0.2], [0.6, 0.2],    # Shoulders at top
+    [0.4, 0.4], [0.6, 0.4],    # Hips
+    [0.4, 0.6], [0.6, 0.6],    # Knees (x shifted by the knee angle)
+    [0.4, 0.8], [0.6, 0.8],    # Ankles
+    [0.4, 0.85], [0.6, 0.85],  # Feet
+    [0.5, 0.1],                # Nose
+])
+_MOCK_KNEE_ROWS = [4, 5]
+
+
+def create_mock_landmark_array(knee_vertical_angle: float = 0.0,
+                               hip_vertical_angle: float = 30.0,
+                               ankle_vertical_angle: float = 10.0) -> np.ndarray:
     """
-    Create mock landmarks that will produce desired angles.
+    Mock (33, 4) landmark array (x, y, z, visibility) approximating the angles.
     This is a simplified mock - in reality the angles would be calculated from positions.
     """
-    # Create 33 landmarks with default positions
-    landmarks = []
-    for i in range(33):
-        landmarks.append({
-            "x": 0.5,
-            "y": 0.5,
-            "z": 0.0,
-            "visibility": 0.9
-        })
-    
-    # Position key landmarks to simulate the desired knee_vertical_angle
-    # The angle is based on hip-knee line with vertical
-    # For simplicity, set positions that approximate the angles
-    
-    # Shoulders at top
-    landmarks[11] = {"x": 0.4, "y": 0.2, "z": 0.0, "visibility": 0.9}  # L shoulder
-    landmarks[12] = {"x": 0.6, "y": 0.2, "z": 0.0, "visibility": 0.9}  # R shoulder
-    
-    # Hips
-    landmarks[23] = {"x": 0.4, "y": 0.4, "z": 0.0, "visibility": 0.9}  # L hip
-    landmarks[24] = {"x": 0.6, "y": 0.4, "z": 0.0, "visibility": 0.9}  # R hip
-    
-    # Knees - adjust x based on knee_vertical_angle
+    arr = np.full((33, 4), [0.5, 0.5, 0.0, 0.9])
+    xy = _MOCK_XY.copy()
     # More angle = knees further forward (x offset)
-    import math
-    knee_x_offset = math.sin(math.radians(knee_vertical_angle)) * 0.2
-    landmarks[25] = {"x": 0.4 + knee_x_offset, "y": 0.6, "z": 0.0, "visibility": 0.9}  # L knee
-    landmarks[26] = {"x": 0.6 + knee_x_offset, "y": 0.6, "z": 0.0, "visibility": 0.9}  # R knee
-    
-    # Ankles
-    landmarks[27] = {"x": 0.4, "y": 0.8, "z": 0.0, "visibility": 0.9}  # L ankle
-    landmarks[28] = {"x": 0.6, "y": 0.8, "z": 0.0, "visibility": 0.9}  # R ankle
-    
-    # Feet
-    landmarks[31] = {"x": 0.4, "y": 0.85, "z": 0.0, "visibility": 0.9}  # L foot
-    landmarks[32] = {"x": 0.6, "y": 0.85, "z": 0.0, "visibility": 0.9}  # R foot
-    
-    # Nose
-    landmarks[0] = {"x": 0.5, "y": 0.1, "z": 0.0, "visibility": 0.9}
-    
-    return landmarks
+    xy[_MOCK_KNEE_ROWS, 0] += math.sin(math.radians(knee_vertical_angle)) * 0.2
+    arr[_MOCK_IDX, :2] = xy
+    return arr
+
+
+def create_mock_landmarks(knee_vertical_angle: float = 0.0, 
+                          hip_vertical_angle: float = 30.0,
+                          ankle_vertical_angle: float = 10.0):
+    """create_mock_landmark_array as a list of landmark dicts."""
+    arr = create_mock_landmark_array(knee_vertical_angle, hip_vertical_angle,
+                                     ankle_vertical_angle)
+    return [dict(zip(LANDMARK_FIELDS, row)) for row in arr.tolist()]
 
 
 class TestFitnessTrainerInit:
@@ -99,6 +94,21 @@ class TestFitnessTrainerReset:
         trainer.reset(WorkoutMode.PRO)
         
         assert trainer.mode == WorkoutMode.PRO
+    
+    def test_reset_leaves_earlier_summary_intact(self):
+        """Reset clears history in place without touching a taken summary."""
+        trainer = FitnessTrainer()
+        trainer.correct_count = 1
+        trainer._record_depth(85.0)
+        trainer._record_feedback(FeedbackType.DEEP_SQUAT)
+        summary = trainer.get_summary()
+        
+        trainer.reset()
+        
+        assert trainer.depth_angles == [] and trainer._calculate_form_score() == 0.0
+        assert trainer.get_summary().feedback_counts == {}
+        assert summary.depth_angles == [85.0]
+        assert summary.feedback_counts == {"deep_squat": 1}
 
 
 class TestFitnessTrainerAnalysis:
@@ -107,7 +117,7 @@ class TestFitnessTrainerAnalysis:
     def test_full_body_visibility(self):
         """Returns is_full_body_visible when all landmarks present."""
         trainer = FitnessTrainer()
-        landmarks = create_mock_landmarks(knee_vertical_angle=10.0)
+        landmarks = create_mock_landmark_array(knee_vertical_angle=10.0)
         
         # Run multiple times to pass visibility threshold
         for _ in range(5):
@@ -115,6 +125,67 @@ class TestFitnessTrainerAnalysis:
         
         assert result.is_full_body_visible == True
     
+    def test_landmark_at_edge_not_visible(self):
+        """A key landmark in the boundary margin blocks readiness."""
+        trainer = FitnessTrainer()
+        landmarks = create_mock_landmarks(knee_vertical_angle=10.0)
+        landmarks[27] = {"x": 0.4, "y": 0.99, "z": 0.0, "visibility": 0.9}  # L ankle
+        
+        result = trainer.analyze(landmarks)
+        
+        assert result.is_full_body_visible == False
+        assert result.debug_info == "Missing: L.Ankle(edge)"
+    
+    def test_low_visibility_not_visible(self):
+        """A key landmark below the visibility threshold blocks readiness."""
+        trainer = FitnessTrainer()
+        landmarks = create_mock_landmarks(knee_vertical_angle=10.0)
+        landmarks[0] = {"x": 0.5, "y": 0.1, "z": 0.0, "visibility": 0.1}  # Nose
+        
+        result = trainer.analyze(landmarks)
+        
+        assert result.is_full_body_visible == False
+        assert result.debug_info == "Missing: Nose(vis)"
+    
+    def test_not_ready_skips_angles(self):
+        """Frames before readiness return early without angle analysis."""
+        trainer = FitnessTrainer()
+        landmarks = create_mock_landmarks(knee_vertical_angle=10.0)
+        
+        result = trainer.analyze(landmarks)  # 1 of frames_required
+        
+        assert result.is_full_body_visible and not result.is_ready
+        assert result.feedback_message == "Position full body in frame"
+        assert result.knee_angle == 180.0 and not result.is_frontal_view
+    
+    def test_first_ready_frame_resets_knee_baseline(self):
+        """A knee angle from before readiness doesn't count as movement."""
+        trainer = FitnessTrainer()
+        trainer.last_knee_vertical = 60.0  # Left over from an earlier set
+        landmarks = create_mock_landmarks(knee_vertical_angle=10.0)
+        for i in (11, 12):  # Shoulders overlap: side view, not frontal
+            landmarks[i] = {"x": 0.5, "y": 0.2, "z": 0.0, "visibility": 0.9}
+        
+        for _ in range(trainer.config.frames_required):
+            result = trainer.analyze(landmarks)
+        
+        assert result.is_ready and not result.is_frontal_view
+        assert trainer.last_knee_vertical == result.knee_vertical_angle
+        assert trainer.active_ns == 0
+    
+    def test_array_input_matches_dicts(self):
+        """A (33, 4) array gives the same result as the landmark dicts."""
+        landmarks = create_mock_landmarks(knee_vertical_angle=10.0)
+        arr = create_mock_landmark_array(knee_vertical_angle=10.0)
+        
+        trainer_a, trainer_b = FitnessTrainer(), FitnessTrainer()
+        for _ in range(4):
+            from_dicts = trainer_a.analyze(landmarks).to_dict()
+            from_array = trainer_b.analyze(arr).to_dict()
+            from_dicts.pop("inactivity_seconds")
+            from_array.pop("inactivity_seconds")
+            assert from_array == pytest.approx(from_dicts)
+    
     def test_incomplete_landmarks(self):
         """Handles incomplete landmarks gracefully."""
         trainer = FitnessTrainer()
@@ -123,6 +194,194 @@ class TestFitnessTrainerAnalysis:
         result = trainer.analyze(landmarks)
         
         assert "Incomplete" in result.debug_info or not result.is_full_body_visible
+    
+    def test_result_converts_to_model(self):
+        """The hot-path result round-trips into the Pydantic response model."""
+        trainer = FitnessTrainer()
+        result = trainer.analyze(create_mock_landmarks(knee_vertical_angle=10.0))
+        
+        model = result.to_model()
+        
+        assert model.model_dump() == result.to_dict()
+    
+    def test_result_reset_matches_fresh_instance(self):
+        """reset() restores every field, including ones added later."""
+        trainer = FitnessTrainer()
+        for _ in range(4):
+            result = trainer.analyze(create_mock_landmarks(knee_vertical_angle=10.0))
+        for name in result.__slots__:
+            setattr(result, name, object())
+        
+        result.reset()
+        
+        assert result == AnalysisResultFast()
+        assert result.state_sequence is not AnalysisResultFast().state_sequence
+    
+    def test_result_buffer_reused_and_reset(self):
+        """analyze hands back one reused result, reset to defaults each frame."""
+        trainer = FitnessTrainer()
+        edge = create_mock_landmarks(knee_vertical_angle=10.0)
+        edge[27] = {"x": 0.4, "y": 0.99, "z": 0.0, "visibility": 0.9}  # L ankle
+        
+        first = trainer.analyze(edge)
+        first.knee_angle = 42.0
+        second = trainer.analyze([{"x": 0.5, "y": 0.5}] * 10)
+        
+        assert second is first
+        assert second.knee_angle == 180.0
+        assert second.debug_info == "Incomplete pose data"
+    
+    def test_enums_serialize_to_wire_names(self):
+        """Integer enums still go out as "s1" / "bend_forward" strings."""
+        trainer = FitnessTrainer()
+        result = trainer.analyze(create_mock_landmarks(knee_vertical_angle=10.0))
+        result.feedback_type = FeedbackType.BEND_FORWARD
+        
+        for d in (result.to_dict(), result.to_model().model_dump(mode="json")):
+            assert d["current_state"] == "s1"
+            assert d["feedback_type"] == "bend_forward"
+
+    def test_model_reads_back_its_json(self):
+        """Wire names parse back into the integer enums."""
+        model = AnalysisResult(current_state=SquatState.S3_PASS,
+                               feedback_type=FeedbackType.DEEP_SQUAT)
+
+        parsed = AnalysisResult.model_validate_json(model.model_dump_json())
+
+        assert parsed == model
+        assert parsed.current_state is SquatState.S3_PASS
+        assert parsed.feedback_type is FeedbackType.DEEP_SQUAT
+
+    def test_schema_lists_wire_names(self):
+        """The response schema keeps the enum values clients receive."""
+        props = AnalysisResult.model_json_schema(mode="serialization")["properties"]
+
+        assert props["current_state"]["enum"] == ["s1", "s2", "s3"]
+        assert "bend_forward" in props["feedback_type"]["enum"]
+
+
+class TestDetermineState:
+    """State lookup table must honour the inclusive threshold boundaries."""
+    
+    @pytest.mark.parametrize("mode", [WorkoutMode.BEGINNER, WorkoutMode.PRO])
+    def test_boundaries(self, mode):
+        trainer = FitnessTrainer(mode)
+        cfg = trainer.config
+        trainer.current_state = SquatState.S2_TRANSITION  # visible in gaps
+        
+        assert trainer._determine_state(cfg.state_s1_max) == SquatState.S1_NORMAL
+        assert trainer._determine_state(cfg.state_s1_max + 0.5) == SquatState.S2_TRANSITION
+        assert trainer._determine_state(cfg.state_s2_min) == SquatState.S2_TRANSITION
+        assert trainer._determine_state(cfg.state_s2_max) == SquatState.S2_TRANSITION
+        assert trainer._determine_state(cfg.state_s3_min) == SquatState.S3_PASS
+        assert trainer._determine_state(cfg.state_s3_max) == SquatState.S3_PASS
+        assert trainer._determine_state(cfg.state_s3_max + 10) == SquatState.S3_PASS
+    
+    def test_gap_keeps_previous_state(self):
+        trainer = FitnessTrainer(WorkoutMode.PRO)
+        trainer.current_state = SquatState.S3_PASS
+        assert trainer._determine_state(70.0) == SquatState.S3_PASS
+        trainer.current_state = SquatState.S1_NORMAL
+        assert trainer._determine_state(33.0) == SquatState.S1_NORMAL
+
+
+class TestDetermineFeedback:
+    """Feedback rules are applied in priority order (severe first)."""
+    
+    def test_knee_over_toes_has_priority(self):
+        trainer = FitnessTrainer(WorkoutMode.PRO)
+        trainer.current_state = SquatState.S3_PASS
+        feedback, _, severe = trainer._determine_feedback(10.0, 100.0, 40.0, False)
+        assert feedback == FeedbackType.KNEE_OVER_TOES
+        assert severe
+    
+    def test_deep_squat_only_in_s3(self):
+        trainer = FitnessTrainer(WorkoutMode.PRO)
+        trainer.current_state = SquatState.S3_PASS
+        assert trainer._determine_feedback(30.0, 100.0, 10.0, False)[0] == FeedbackType.DEEP_SQUAT
+        trainer.current_state = SquatState.S2_TRANSITION
+        assert trainer._determine_feedback(30.0, 100.0, 10.0, False)[0] == FeedbackType.NONE
+    
+    def test_torso_feedback(self):
+        trainer = FitnessTrainer(WorkoutMode.PRO)
+        assert trainer._determine_feedback(10.0, 20.0, 10.0, False)[0] == FeedbackType.BEND_FORWARD
+        assert trainer._determine_feedback(50.0, 20.0, 10.0, False)[0] == FeedbackType.BEND_BACKWARDS
+    
+    def test_lower_hips_only_when_descending_in_s2(self):
+        trainer = FitnessTrainer(WorkoutMode.PRO)
+        trainer.current_state = SquatState.S2_TRANSITION
+        assert trainer._determine_feedback(30.0, 60.0, 10.0, True)[0] == FeedbackType.LOWER_HIPS
+        assert trainer._determine_feedback(30.0, 60.0, 10.0, False) == (FeedbackType.NONE, "", False)
+    
+    def test_good_form_by_state(self):
+        trainer = FitnessTrainer(WorkoutMode.PRO)
+        assert trainer._determine_feedback(30.0, 10.0, 10.0, False)[0] == FeedbackType.READY
+        trainer.current_state = SquatState.S3_PASS
+        assert trainer._determine_feedback(30.0, 80.0, 10.0, False) == (
+            FeedbackType.NONE, "Good depth! Now stand up.", False
+        )
+
+
+class TestComputeAllAngles:
+    """Per-frame angles must use the right joints; the batch path must agree."""
+    
+    def test_matches_scalar_helpers(self):
+        rng = np.random.default_rng(0)
+        xs = rng.random(33)
+        ys = rng.random(33)
+        pt = lambda i: (xs[i], ys[i])
+        
+        offset, l_knee, r_knee, l_vert, r_vert = _compute_all_angles(
+            [pt(i) for i in KEY_INDICES])
+        
+        assert offset == pytest.approx(offset_angle(pt(0), pt(11), pt(12)))
+        assert l_knee == pytest.approx(angle_at_point(pt(23), pt(25), pt(27)))
+        assert r_knee == pytest.approx(angle_at_point(pt(24), pt(26), pt(28)))
+        assert l_vert == pytest.approx((
+            angle_with_vertical(pt(11), pt(23)),
+            angle_with_vertical(pt(23), pt(25)),
+            angle_with_vertical(pt(25), pt(27)),
+        ))
+        assert r_vert == pytest.approx((
+            angle_with_vertical(pt(12), pt(24)),
+            angle_with_vertical(pt(24), pt(26)),
+            angle_with_vertical(pt(26), pt(28)),
+        ))
+    
+    def test_batch_matches_single_frame(self):
+        rng = np.random.default_rng(1)
+        xs = rng.random((5, 33))
+        ys = rng.random((5, 33))
+        
+        batch = _compute_all_angles_batch(xs, ys)
+        
+        for i in range(5):
+            offset, l_knee, r_knee, l_vert, r_vert = _compute_all_angles(
+                list(zip(xs[i, KEY_INDICES], ys[i, KEY_INDICES])))
+            assert batch[i] == pytest.approx([offset, l_knee, r_knee, *l_vert, *r_vert])
+
+
+class TestAnalyzeBatch:
+    """analyze_batch must agree with analyze called frame by frame."""
+    
+    def test_matches_sequential_analyze(self):
+        angles = (0, 10, 40, 80, 40, 10)
+        batch = np.stack([create_mock_landmark_array(knee_vertical_angle=a) for a in angles])
+        batch[1, 27] = [0.4, 0.99, 0.0, 0.9]  # L ankle at edge
+        frames = [[dict(zip(LANDMARK_FIELDS, row)) for row in f] for f in batch.tolist()]
+        
+        sequential = FitnessTrainer()
+        expected = [sequential.analyze(f).to_dict() for f in frames]
+        results = [r.to_dict() for r in FitnessTrainer().analyze_batch(batch)]
+        
+        for got, want in zip(results, expected):
+            got.pop("inactivity_seconds")
+            want.pop("inactivity_seconds")
+            assert got == pytest.approx(want)
+    
+    def test_rejects_bad_shape(self):
+        with pytest.raises(ValueError):
+            FitnessTrainer().analyze_batch(np.zeros((2, 33, 3)))
 
 
 class TestWorkoutSummary:
@@ -149,6 +408,47 @@ class TestWorkoutSummary:
         assert summary.correct_reps == 8
         assert summary.incorrect_reps == 2
         assert summary.accuracy_percentage == 80.0
+    
+    def test_form_score_uses_depth_std(self):
+        """Running depth std matches np.std over the recorded angles."""
+        trainer = FitnessTrainer()
+        trainer.correct_count = 4
+        angles = [85.0, 88.0, 82.0, 91.5]
+        for angle in angles:
+            trainer._record_depth(angle)
+        
+        expected = 50 + (25 - np.std(angles)) + 25
+        assert trainer._calculate_form_score() == pytest.approx(expected)
+    
+    def test_form_score_follows_assigned_depth_angles(self):
+        """Replacing depth_angles directly doesn't leave a stale form score."""
+        trainer = FitnessTrainer()
+        trainer.correct_count = 4
+        for angle in (60.0, 120.0):
+            trainer._record_depth(angle)
+        
+        angles = [85.0, 88.0, 82.0, 91.5]
+        trainer.depth_angles = angles
+        
+        expected = 50 + (25 - np.std(angles)) + 25
+        assert trainer._calculate_form_score() == pytest.approx(expected)
+        
+        trainer._record_depth(80.0)  # Appends to the assigned list
+        assert trainer.depth_angles == [85.0, 88.0, 82.0, 91.5, 80.0]
+        expected = 50 + (25 - np.std(trainer.depth_angles)) + 25
+        assert trainer._calculate_form_score() == pytest.approx(expected)
+    
+    def test_summary_feedback_counts(self):
+        """Only issues are counted; the most frequent one is reported."""
+        trainer = FitnessTrainer()
+        for ft in (FeedbackType.BEND_FORWARD, FeedbackType.KNEE_OVER_TOES,
+                   FeedbackType.KNEE_OVER_TOES, FeedbackType.READY, FeedbackType.NONE):
+            trainer._record_feedback(ft)
+        
+        summary = trainer.get_summary()
+        
+        assert summary.feedback_counts == {"bend_forward": 1, "knee_over_toes": 2}
+        assert summary.most_common_issue == "knee_over_toes"
 
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+"""
+Tests for the pose server endpoints and WebSocket protocol.
+"""
+import asyncio
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+import pose_server
+from pose_server import app, decode_message
+from tests.test_fitness_trainer import create_mock_landmarks
+
+
+def make_frame(**overrides) -> bytes:
+    """Encoded pose frame from the mock landmarks."""
+    frame = {
+        "landmarks": create_mock_landmarks(knee_vertical_angle=10.0),
+        "timestamp": 0,
+        "mode": "beginner",
+        "frame_width": 640,
+        "frame_height": 480,
+    }
+    frame.update(overrides)
+    return orjson.dumps(frame)
+
+
+@pytest.fixture
+def ws():
+    """Open WebSocket connection to /ws/analyze."""
+    with TestClient(app).websocket_connect("/ws/analyze") as websocket:
+        yield websocket
+
+
+class TestHealth:
+    """Tests for /api/health."""
+    
+    def test_health_body(self):
+        """The cached body is served as the HealthResponse JSON."""
+        reply = TestClient(app).get("/api/health")
+        
+        assert reply.status_code == 200
+        assert reply.json() == {"status": "healthy", "version": "1.0.0"}
+    
+    def test_fresh_response_per_request(self):
+        """Requests don't share one (mutable) Response object."""
+        first = asyncio.run(pose_server.health_check())
+        second = asyncio.run(pose_server.health_check())
+        
+        assert first is not second
+        assert first.body == second.body
+
+
+class TestDecodeMessage:
+    """Tests for decode_message."""
+    
+    def test_full_frame(self):
+        """A pose frame decodes to (None, mode, landmarks, width, height)."""
+        command, mode, landmarks, width, height = decode_message(make_frame(mode="pro"))
+        
+        assert command is None and mode == "pro"
+        assert len(landmarks) == 33
+        assert (width, height) == (640, 480)
+    
+    def test_loose_field_types(self):
+        """Float frame sizes and a null mode are passed through."""
+        command, mode, landmarks, width, height = decode_message(
+            make_frame(mode=None, frame_width=640.0, frame_height=480.0))
+        
+        assert command is None and mode is None
+        assert len(landmarks) == 33
+        assert (width, height) == (640, 480)
+    
+    def test_command_defaults(self):
+        """A bare command gets the frame defaults."""
+        decoded = decode_message(b'{"command": "summary"}')
+        
+        assert decoded[0] == "summary" and decoded[1] == "beginner"
+        assert len(decoded[2]) == 0
+        assert decoded[3:] == (640, 480)
+
+
+class TestWebSocketAnalyze:
+    """Tests for /ws/analyze."""
+    
+    def test_loose_frame_is_analyzed(self, ws):
+        """A frame with a null mode and float sizes gets an analysis result."""
+        ws.send_bytes(make_frame(mode=None, frame_width=640.0))
+        
+        reply = orjson.loads(ws.receive_text())
+        
+        assert reply["current_state"] == "s1"
+        assert reply["is_full_body_visible"] is True
+    
+    def test_wrong_shape_is_not_invalid_json(self, ws):
+        """Well-formed JSON with unusable landmarks is not reported as bad JSON."""
+        landmarks = [{"x": "left", "y": 0.5}] * 33
+        ws.send_bytes(make_frame(landmarks=landmarks))
+        
+        reply = orjson.loads(ws.receive_text())
+        
+        assert reply["error"] != "Invalid JSON format"
+    
+    def test_repeated_result_skipped(self, ws):
+        """An identical result is not sent twice in a row."""
+        ws.send_bytes(make_frame())
+        first = orjson.loads(ws.receive_text())
+        ws.send_bytes(make_frame())
+        ws.send_text('{"command": "summary"}')
+        
+        assert "current_state" in first
+        assert "total_reps" in orjson.loads(ws.receive_text())
+    
+    @pytest.mark.parametrize("interruption", [
+        b'{"landmarks": []}',
+        orjson.dumps({"landmarks": [{"x": 0.5, "y": 0.5}] * 32, "pad": " " * 1024}),
+        b'{"command": "summary"}',
+        b'{"command": "reset", "mode": "beginner"}',
+        b"{" + b" " * 1024,
+    ], ids=["short_frame", "too_few_landmarks", "summary", "reset", "invalid_json"])
+    def test_result_resent_after_other_reply(self, ws, interruption):
+        """A result equal to the last one is still sent after an error or command."""
+        ws.send_bytes(make_frame())
+        first = ws.receive_text()
+        ws.send_bytes(interruption)
+        other = orjson.loads(ws.receive_text())
+        ws.send_bytes(make_frame())
+        # Always answered, so a dropped result fails instead of blocking
+        ws.send_text('{"command": "summary"}')
+        
+        assert "current_state" not in other
+        assert ws.receive_text() == first
+    
+    def test_invalid_json(self, ws):
+        """Unparseable frames are reported as invalid JSON."""
+        ws.send_text("{" + " " * pose_server.MIN_FRAME_BYTES)
+        
+        assert orjson.loads(ws.receive_text()) == {"error": "Invalid JSON format"}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])